@@ -0,0 +1,86 @@
+"""
+Benchmark the memory used per agent by different agent layouts.
+
+Each layout stores the same state as forest_fire's TreeCell: unique_id,
+model, pos and a condition. The script reports the bytes allocated per
+agent, measured with tracemalloc, for an agent keeping everything in its
+__dict__ (as every agent did before mesa.Agent declared __slots__), for a
+subclass declaring __slots__, and for a slotted subclass keeping condition in
+an AgentAttribute column.
+
+Usage:
+    python benchmarks/agent_memory.py [--agents 1000000]
+"""
+import argparse
+import tracemalloc
+
+import mesa
+
+
+class DictTree:
+    """TreeCell on top of the former, unslotted mesa.Agent."""
+
+    def __init__(self, pos, model):
+        self.unique_id = pos
+        self.model = model
+        self.pos = None
+        self.pos = pos
+        self.condition = "Fine"
+
+
+class SlottedTree(mesa.Agent):
+    __slots__ = ("condition",)
+
+    def __init__(self, pos, model):
+        super().__init__(pos, model)
+        self.pos = pos
+        self.condition = "Fine"
+
+
+class ColumnTree(mesa.Agent):
+    __slots__ = ()
+
+    condition = mesa.AgentAttribute(categories=("Fine", "On Fire", "Burned Out"))
+
+    def __init__(self, pos, model):
+        super().__init__(pos, model)
+        self.pos = pos
+
+
+class EmptyModel(mesa.Model):
+    def __init__(self):
+        pass
+
+
+def bytes_per_agent(agent_class, n_agents):
+    model = EmptyModel()
+    side = int(n_agents**0.5) + 1
+    positions = [(i % side, i // side) for i in range(n_agents)]
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    agents = [agent_class(pos, model) for pos in positions]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del agents
+    return used / n_agents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--agents", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'layout':>28} {'bytes/agent':>12} {'ratio':>6}")
+    for name, agent_class in [
+        ("__dict__", DictTree),
+        ("__slots__", SlottedTree),
+        ("__slots__ + AgentAttribute", ColumnTree),
+    ]:
+        used = bytes_per_agent(agent_class, args.agents)
+        baseline = baseline or used
+        print(f"{name:>28} {used:>12.1f} {used / baseline:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark batch_run throughput with many short runs.
+
+The schelling and forest_fire models are run on small grids for a few steps,
+so that dispatching the runs and sending their results back dominates, and
+schelling also on a larger grid, so that its agent data gets large. The
+script reports the runs per second of batch_run with a new pool per call and
+one run per task (as before chunked dispatch), with a new pool per call and
+the default chunk size, with one pool reused by all the calls, and with the
+reused pool sending agent data through shared memory. It also reports the
+pickled size of the results of a run, as the dict per agent workers used to
+send back and as the columns they send now.
+
+Usage:
+    python benchmarks/batch_run.py [--runs 100] [--calls 3] [--processes 4]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from multiprocessing import Pool
+
+from mesa.batchrunner import _model_run_func, batch_run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "simulations", "schelling"))
+sys.path.insert(0, os.path.join(ROOT, "simulations", "forest_fire"))
+
+from forest_fire.model import ForestFire  # noqa: E402
+from model import Schelling  # noqa: E402
+
+MODELS = {
+    "schelling": (Schelling, {"width": 10, "height": 10, "density": 0.8}),
+    "schelling_large": (Schelling, {"width": 60, "height": 60, "density": 0.8}),
+    "forest_fire": (ForestFire, {"width": 20, "height": 20, "density": 0.65}),
+}
+
+
+def time_calls(model_cls, parameters, args, **kwargs):
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        batch_run(
+            model_cls,
+            parameters,
+            iterations=args.runs,
+            max_steps=args.steps,
+            data_collection_period=1,
+            display_progress=False,
+            **kwargs,
+        )
+    return args.calls * args.runs / (time.perf_counter() - start)
+
+
+def result_sizes(model_cls, parameters, steps):
+    """Return the pickled size of the results of a run, as a dict per agent
+    per step and as columns.
+
+    """
+    _, data = _model_run_func(
+        model_cls, parameters, max_steps=steps, data_collection_period=1
+    )
+    rows = []
+    for model_data, agent_data in data:
+        if agent_data:
+            names = list(agent_data)
+            columns = [agent_data[name].tolist() for name in names]
+            rows.extend(
+                {**model_data, **dict(zip(names, row))} for row in zip(*columns)
+            )
+        else:
+            rows.append(model_data)
+    return len(pickle.dumps(rows)), len(pickle.dumps(data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    print(
+        f"{'model':>15} {'chunks of 1':>12} {'chunked':>12} {'shared pool':>12} "
+        f"{'shm':>12} {'dicts (kB)':>11} {'columns (kB)':>13}"
+    )
+    for name, (model_cls, parameters) in MODELS.items():
+        single = time_calls(
+            model_cls, parameters, args, number_processes=args.processes, chunksize=1
+        )
+        chunked = time_calls(
+            model_cls, parameters, args, number_processes=args.processes
+        )
+        with Pool(args.processes) as pool:
+            shared = time_calls(
+                model_cls, parameters, args, pool=pool, number_processes=args.processes
+            )
+            shm = time_calls(
+                model_cls,
+                parameters,
+                args,
+                pool=pool,
+                number_processes=args.processes,
+                shared_memory=True,
+            )
+        dicts, columns = result_sizes(model_cls, parameters, args.steps)
+        print(
+            f"{name:>15} {single:>12.0f} {chunked:>12.0f} {shared:>12.0f} "
+            f"{shm:>12.0f} {dicts / 1e3:>11.1f} {columns / 1e3:>13.1f}"
+        )
+    print("(runs per second)")
+
+
+if __name__ == "__main__":
+    main()
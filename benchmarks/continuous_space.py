@@ -0,0 +1,85 @@
+"""
+Benchmark ContinuousSpace neighbor queries.
+
+Agents are placed uniformly at random, and the search radius is chosen so
+that each query finds about ten neighbors whatever the number of agents.
+The script reports the average time of a query at the position of a random
+agent, for the brute-force search, for the bucket index, and for one
+get_neighbors_batch call covering every agent.
+
+Usage:
+    python benchmarks/continuous_space.py [--sizes 10000 100000 1000000] [--queries 1000]
+"""
+import argparse
+import math
+import random
+import timeit
+
+from mesa.space import ContinuousSpace
+
+
+class PointAgent:
+    """Minimal stand-in for an agent; the space only uses pos."""
+
+    def __init__(self, unique_id):
+        self.unique_id = unique_id
+        self.pos = None
+
+
+def build_space(n_agents, side, bucket_size, seed):
+    rng = random.Random(seed)
+    space = ContinuousSpace(side, side, True, bucket_size=bucket_size)
+    agents = [PointAgent(i) for i in range(n_agents)]
+    for agent in agents:
+        space.place_agent(agent, (rng.uniform(0, side), rng.uniform(0, side)))
+    return space, agents
+
+
+def time_queries(space, positions, radius):
+    def run():
+        for pos in positions:
+            space.get_neighbors(pos, radius)
+
+    return min(timeit.repeat(run, number=1, repeat=3)) / len(positions)
+
+
+def time_batch(space, positions, radius):
+    def run():
+        space.get_neighbors_batch(positions, radius)
+
+    return min(timeit.repeat(run, number=1, repeat=3)) / len(positions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--neighbors", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    side = 1000.0
+    print(
+        f"{'agents':>10} {'radius':>8} {'brute (us)':>12} {'index (us)':>12} "
+        f"{'speedup':>8} {'batch (us)':>12}"
+    )
+    for n_agents in args.sizes:
+        radius = math.sqrt(args.neighbors * side * side / (math.pi * n_agents))
+        rng = random.Random(args.seed)
+
+        space, agents = build_space(n_agents, side, None, args.seed)
+        positions = [a.pos for a in rng.sample(agents, min(args.queries, n_agents))]
+        brute = time_queries(space, positions, radius)
+
+        space, _ = build_space(n_agents, side, radius, args.seed)
+        indexed = time_queries(space, positions, radius)
+        batch = time_batch(space, [a.pos for a in agents], radius)
+
+        print(
+            f"{n_agents:>10} {radius:>8.2f} {brute * 1e6:>12.1f} "
+            f"{indexed * 1e6:>12.1f} {brute / indexed:>8.1f} {batch * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
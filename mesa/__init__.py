@@ -7,22 +7,25 @@ Core Objects: Model, and Agent.
 import datetime
 
 from mesa.model import Model
-from mesa.agent import Agent
+from mesa.agent import Agent, AgentAttribute, TrackedAttribute
 
 import mesa.time as time
 import mesa.space as space
 import mesa.flat.visualization as visualization
 from mesa.datacollection import DataCollector
-from mesa.batchrunner import batch_run  # noqa
+from mesa.batchrunner import batch_run, batch_run_iter  # noqa
 
 __all__ = [
     "Model",
     "Agent",
+    "AgentAttribute",
+    "TrackedAttribute",
     "time",
     "space",
     "visualization",
     "DataCollector",
     "batch_run",
+    "batch_run_iter",
 ]
 
 __title__ = "mesa"
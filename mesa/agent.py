@@ -1,17 +1,21 @@
 """
 The agent class for Mesa framework.
 
-Core Objects: Agent
+Core Objects: Agent, AgentAttribute, TrackedAttribute
 
 """
 # Mypy; for the `|` operator purpose
 # Remove this __future__ import once the oldest supported Python is 3.10
 from __future__ import annotations
 
+import inspect
+
 # mypy
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List
 from random import Random
 
+import numpy as np
+
 if TYPE_CHECKING:
     # We ensure that these are not imported during runtime to prevent cyclic
     # dependency.
@@ -19,8 +23,238 @@ if TYPE_CHECKING:
     from mesa.space import Position
 
 
+def _attribute_listeners(agent: Agent, name: str) -> List[Callable] | None:
+    """Return the listeners registered for an attribute on the agent's model."""
+    model = getattr(agent, "model", None)
+    listeners = getattr(model, "__dict__", {}).get("_attribute_listeners")
+    return listeners.get(name) if listeners else None
+
+
+class AgentAttribute:
+    """An agent field stored in a model-level NumPy column.
+
+    Declare fields in the body of an Agent subclass, e.g.
+
+        class TreeCell(Agent):
+            condition = AgentAttribute(categories=("Fine", "On Fire"))
+
+    Each agent then reads and writes its own entry of a column shared by all
+    the agents of its class in the model (see AttributeStore), so bulk
+    queries over a field run in NumPy instead of looping over agents.
+    """
+
+    def __init__(
+        self,
+        dtype: Any = float,
+        default: Any = None,
+        categories: Iterable[Any] | None = None,
+    ) -> None:
+        """Declare a new field.
+
+        Args:
+            dtype: NumPy dtype of the column. Ignored for categorical fields.
+            default: Value of the field for a new agent; defaults to zero, or
+                     to the first category.
+            categories: If provided, the field only takes these values, and
+                        the column stores their positions in this sequence.
+        """
+        self.name: str | None = None
+        if categories is not None:
+            self.categories: tuple | None = tuple(categories)
+            self._codes = {value: code for code, value in enumerate(self.categories)}
+            self.dtype = np.dtype(np.uint8 if len(self.categories) <= 256 else np.int32)
+            self.default = self.categories[0] if default is None else default
+        else:
+            self.categories = None
+            self.dtype = np.dtype(dtype)
+            self.default = 0 if default is None else default
+        self.default_code = self.encode(self.default)
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def encode(self, value: Any) -> Any:
+        """Return the value as stored in the column."""
+        if self.categories is None:
+            return value
+        try:
+            return self._codes[value]
+        except KeyError:
+            raise ValueError(f"{value!r} is not a category of {self.name}") from None
+
+    def __get__(self, agent: Agent | None, owner: type | None = None) -> Any:
+        if agent is None:
+            return self
+        store = agent.model._attribute_stores[type(agent)]
+        value = store.columns[self.name][agent._attribute_slot]
+        if self.categories is not None:
+            return self.categories[value]
+        return value.item()
+
+    def __set__(self, agent: Agent, value: Any) -> None:
+        listeners = _attribute_listeners(agent, self.name)
+        if listeners:
+            old = self.__get__(agent)
+        column = agent.model._attribute_stores[type(agent)].columns[self.name]
+        column[agent._attribute_slot] = self.encode(value)
+        if listeners:
+            for listener in listeners:
+                listener(agent, old, value)
+
+
+class TrackedAttribute:
+    """An agent attribute whose changes are reported to the listeners
+    registered on the agent's model with Model.add_attribute_listener.
+
+    Agent subclasses list the attributes to track in tracked_attributes:
+
+        class VirusAgent(Agent):
+            __slots__ = ("state",)
+            tracked_attributes = ("state",)
+
+    The value stays where it would be otherwise, in its slot or in the
+    instance __dict__; only assignments go through the listeners.
+    """
+
+    def __init__(self, name: str, slot: Any = None) -> None:
+        """Track an attribute.
+
+        Args:
+            name: Name of the attribute.
+            slot: Member descriptor of the attribute's slot, if it has one.
+        """
+        self.name = name
+        self.slot = slot
+
+    def __get__(self, agent: Agent | None, owner: type | None = None) -> Any:
+        if agent is None:
+            return self
+        if self.slot is not None:
+            return self.slot.__get__(agent, owner)
+        try:
+            return agent.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, agent: Agent, value: Any) -> None:
+        listeners = _attribute_listeners(agent, self.name)
+        if listeners:
+            try:
+                old = self.__get__(agent)
+            except AttributeError:
+                old = None
+        if self.slot is not None:
+            self.slot.__set__(agent, value)
+        else:
+            agent.__dict__[self.name] = value
+        if listeners:
+            for listener in listeners:
+                listener(agent, old, value)
+
+
+class AttributeStore:
+    """Columns holding the AgentAttribute fields of one agent class in a model.
+
+    Every agent of the class takes a slot, a row of all the columns, when it
+    is created. Call release() when an agent leaves the model for good, so
+    that bulk queries skip it and its slot can be reused.
+    """
+
+    def __init__(self, fields: Dict[str, AgentAttribute]) -> None:
+        """Create empty columns for the given fields.
+
+        Args:
+            fields: Dictionary of field names to their declarations.
+        """
+        self.fields = fields
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.empty(16, dtype=field.dtype) for name, field in fields.items()
+        }
+        self._live = np.zeros(16, dtype=bool)
+        self._free: List[int] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size - len(self._free)
+
+    def allocate(self) -> int:
+        """Reserve a slot with default values and return its index."""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = self._size
+            self._size += 1
+            if slot == len(self._live):
+                self._live = np.concatenate([self._live, np.zeros_like(self._live)])
+                for name, column in self.columns.items():
+                    self.columns[name] = np.concatenate([column, np.empty_like(column)])
+        self._live[slot] = True
+        for name, field in self.fields.items():
+            self.columns[name][slot] = field.default_code
+        return slot
+
+    def release(self, agent: Agent) -> None:
+        """Free the slot of an agent removed from the model."""
+        slot = agent._attribute_slot
+        if not self._live[slot]:
+            raise ValueError("Agent has already been released.")
+        self._live[slot] = False
+        self._free.append(slot)
+
+    def values(self, name: str) -> np.ndarray:
+        """Return the stored values of a field for the live agents.
+
+        Categorical fields are returned as codes; see AgentAttribute.encode.
+        """
+        size = self._size
+        return self.columns[name][:size][self._live[:size]]
+
+    def count(self, name: str, value: Any) -> int:
+        """Return the number of live agents whose field equals value."""
+        size = self._size
+        matches = self.columns[name][:size] == self.fields[name].encode(value)
+        return int(np.count_nonzero(matches & self._live[:size]))
+
+
 class Agent:
-    """Base class for a model agent."""
+    """Base class for a model agent.
+
+    Agent declares __slots__, so a subclass that lists its own attributes in
+    __slots__ has no per-instance __dict__, which saves most of the memory of
+    a small agent. Subclasses without __slots__ get a __dict__ as usual.
+    """
+
+    # The AttributeStore of an agent with AgentAttribute fields is found
+    # through its model, so that the agent only keeps its slot index.
+    __slots__ = (
+        "unique_id",
+        "model",
+        "pos",
+        "_attribute_slot",
+    )
+
+    # AgentAttribute fields of the class, including inherited ones.
+    _attribute_fields: Dict[str, AgentAttribute] = {}
+    # Names of attributes whose changes are reported to listeners.
+    tracked_attributes: Iterable[str] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        for name in cls.__dict__.get("tracked_attributes", ()):
+            slot = inspect.getattr_static(cls, name, None)
+            if isinstance(slot, (TrackedAttribute, AgentAttribute)):
+                continue
+            if slot is not None and not inspect.ismemberdescriptor(slot):
+                raise TypeError(f"Cannot track {name}, a class attribute of {cls}.")
+            setattr(cls, name, TrackedAttribute(name, slot))
+        fields: Dict[str, AgentAttribute] = {}
+        for base in reversed(cls.__mro__):
+            for name, value in vars(base).items():
+                if isinstance(value, AgentAttribute):
+                    fields[name] = value
+                elif name in fields:
+                    del fields[name]
+        cls._attribute_fields = fields
 
     def __init__(self, unique_id: int, model: "Model") -> None:
         """Create a new agent.
@@ -32,6 +266,8 @@ class Agent:
         self.unique_id = unique_id
         self.model = model
         self.pos: Position | None = None
+        if self._attribute_fields:
+            self._attribute_slot = model.get_attribute_store(type(self)).allocate()
 
     def step(self) -> None:
         """A single step of the agent."""
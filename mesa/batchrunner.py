@@ -6,26 +6,37 @@ A single class to manage a batch run or parameter sweep of a given model.
 
 """
 import copy
+import hashlib
 import itertools
+import multiprocessing
+import multiprocessing.util
+import os
+import pickle
 import random
+import struct
 from collections import OrderedDict
+from contextlib import nullcontext
 from functools import partial
 from itertools import count, product
 from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import Pool as ProcessPool
 from warnings import warn
 from typing import (
     Any,
-    Counter,
+    Callable,
     Dict,
     Iterable,
+    Iterator,
     List,
     Mapping,
+    NamedTuple,
     Optional,
     Tuple,
     Type,
     Union,
 )
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
@@ -41,6 +52,12 @@ def batch_run(
     data_collection_period: int = -1,
     max_steps: int = 1000,
     display_progress: bool = True,
+    chunksize: Optional[int] = None,
+    pool: Optional[ProcessPool] = None,
+    shared_memory: bool = False,
+    journal: Optional[str] = None,
+    resume: bool = False,
+    seed: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
     """Batch run a mesa model with a set of parameter values.
 
@@ -52,6 +69,8 @@ def batch_run(
         Dictionary with model parameters over which to run the model. You can either pass single values or iterables.
     number_processes : int, optional
         Number of processes used, by default 1. Set this to None if you want to use all CPUs.
+        With pool, the number of processes of the pool, to size the chunks
+        of runs; by default, or if None, one per CPU is assumed.
     iterations : int, optional
         Number of iterations for each parameter combination, by default 1
     data_collection_period : int, optional
@@ -60,14 +79,217 @@ def batch_run(
         Maximum number of model steps after which the model halts, by default 1000
     display_progress : bool, optional
         Display batch run process, by default True
+    chunksize : int, optional
+        Number of runs sent to a worker process at once, by default chosen so
+        that each process gets about four chunks
+    pool : multiprocessing.pool.Pool, optional
+        Pool of worker processes to run the models in, instead of a new pool
+        of number_processes processes. The pool is left open, so that it can
+        be reused by successive batch runs.
+    shared_memory : bool, optional
+        Send the numeric agent data of each run back from the worker processes
+        in a shared memory block rather than through the result pipe, by
+        default False. The blocks sent back but not read, e.g. by an
+        abandoned batch_run_iter, are freed when it stops, and the blocks of
+        runs interrupted by it when the process exits.
+    journal : str, optional
+        Path of a file to record the data of each run in as soon as it is
+        over, keyed by its position in the parameter grid, iteration and
+        seed, by default None
+    resume : bool, optional
+        Resume the sweep recorded in journal: the runs already recorded are
+        read from it rather than run again, by default False. Without resume,
+        an existing journal raises FileExistsError. The model class,
+        parameters, max_steps and data_collection_period must be those of the
+        recorded sweep, and iterations at least its own, or ValueError is
+        raised.
+    seed : int, optional
+        Seed of the sweep, by default None (fresh entropy, or the entropy of
+        the sweep recorded in journal when resuming). Each run gets its own
+        seed, derived from it, the run's parameter values and its iteration,
+        which is passed to the model (see Model) and recorded in the "seed"
+        column of the results. Parameter values that cannot be pickled are
+        hashed by their repr, so must have a stable one for seeds to be
+        reproducible. A seed given in parameters is used as is instead.
 
     Returns
     -------
     List[Dict[str, Any]]
         [description]
     """
+    results: List[Dict[str, Any]] = []
+    for run_data in batch_run_iter(
+        model_cls,
+        parameters,
+        number_processes=number_processes,
+        iterations=iterations,
+        data_collection_period=data_collection_period,
+        max_steps=max_steps,
+        display_progress=display_progress,
+        chunksize=chunksize,
+        pool=pool,
+        shared_memory=shared_memory,
+        journal=journal,
+        resume=resume,
+        seed=seed,
+    ):
+        results.extend(run_data)
+    return results
 
-    kwargs_list = _make_model_kwargs(parameters) * iterations
+
+def batch_run_iter(
+    model_cls: Type[Model],
+    parameters: Mapping[str, Union[Any, Iterable[Any]]],
+    number_processes: Optional[int] = 1,
+    iterations: int = 1,
+    data_collection_period: int = -1,
+    max_steps: int = 1000,
+    display_progress: bool = True,
+    chunksize: Optional[int] = None,
+    pool: Optional[ProcessPool] = None,
+    shared_memory: bool = False,
+    journal: Optional[str] = None,
+    resume: bool = False,
+    seed: Optional[int] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Batch run a mesa model with a set of parameter values, yielding the
+    results of each run as soon as it completes.
+
+    Takes the same parameters as batch_run. Only the results of the runs not
+    consumed yet are held in memory, so that they can be aggregated or
+    written out as they come, e.g. with batch_run_parquet.
+
+    Yields
+    ------
+    List[Dict[str, Any]]
+        The rows of a run, as batch_run returns them
+    """
+    for run_id, iteration, run_seed, run_data in _run_models(
+        model_cls,
+        parameters,
+        number_processes,
+        iterations,
+        data_collection_period,
+        max_steps,
+        display_progress,
+        chunksize,
+        pool,
+        shared_memory,
+        journal,
+        resume,
+        seed,
+    ):
+        rows = []
+        for model_data, agent_data in run_data:
+            out = {"RunId": run_id, "iteration": iteration, "seed": run_seed}
+            out.update(model_data)
+            # If there are agent_reporters, then create an entry for each agent
+            if agent_data:
+                names = list(agent_data)
+                columns = [agent_data[name].tolist() for name in names]
+                rows.extend({**out, **dict(zip(names, row))} for row in zip(*columns))
+            # If there is only model data, then create a single entry for the step
+            else:
+                rows.append(out)
+        yield rows
+
+
+def batch_run_parquet(
+    model_cls: Type[Model],
+    parameters: Mapping[str, Union[Any, Iterable[Any]]],
+    path: str,
+    number_processes: Optional[int] = 1,
+    iterations: int = 1,
+    data_collection_period: int = -1,
+    max_steps: int = 1000,
+    display_progress: bool = True,
+    chunksize: Optional[int] = None,
+    pool: Optional[ProcessPool] = None,
+    shared_memory: bool = False,
+    journal: Optional[str] = None,
+    resume: bool = False,
+    seed: Optional[int] = None,
+) -> str:
+    """Batch run a mesa model with a set of parameter values, writing the
+    results of each run to a Parquet dataset as soon as it completes.
+
+    The dataset is partitioned by run: the rows of each run are written to
+    <path>/RunId=<run id>/part-0.parquet, and can be read back with
+    pandas.read_parquet(path). Requires pyarrow (pip install Mesa[parquet]).
+
+    Takes the same parameters as batch_run, and the path of the directory to
+    write the dataset to, which is returned. The directory must not contain
+    any file yet.
+    """
+    if os.path.isdir(path) and os.listdir(path):
+        raise FileExistsError(f"{path} is not empty.")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as error:
+        raise ImportError(
+            "batch_run_parquet requires pyarrow, which can be installed with "
+            "pip install Mesa[parquet]"
+        ) from error
+
+    for run_id, iteration, run_seed, run_data in _run_models(
+        model_cls,
+        parameters,
+        number_processes,
+        iterations,
+        data_collection_period,
+        max_steps,
+        display_progress,
+        chunksize,
+        pool,
+        shared_memory,
+        journal,
+        resume,
+        seed,
+    ):
+        frames = []
+        for model_data, agent_data in run_data:
+            n_rows = len(agent_data["AgentID"]) if agent_data else 1
+            columns = {"iteration": [iteration] * n_rows, "seed": [run_seed] * n_rows}
+            columns.update((key, [value] * n_rows) for key, value in model_data.items())
+            columns.update(agent_data)
+            frames.append(pd.DataFrame(columns))
+        if not frames:
+            continue
+        partition = os.path.join(path, f"RunId={run_id}")
+        os.makedirs(partition, exist_ok=True)
+        pd.concat(frames, ignore_index=True).to_parquet(
+            os.path.join(partition, "part-0.parquet"), index=False
+        )
+    return path
+
+
+def _run_models(
+    model_cls: Type[Model],
+    parameters: Mapping[str, Union[Any, Iterable[Any]]],
+    number_processes: Optional[int],
+    iterations: int,
+    data_collection_period: int,
+    max_steps: int,
+    display_progress: bool,
+    chunksize: Optional[int],
+    pool: Optional[ProcessPool],
+    shared_memory: bool,
+    journal: Optional[str],
+    resume: bool,
+    seed: Optional[int],
+) -> Iterator[Tuple[int, int, Any, List[Tuple[Dict[str, Any], Dict[str, Any]]]]]:
+    """Run the models of a batch run, in worker processes unless a single
+    process is asked for, and yield the run id, iteration, seed and collected
+    data of each run as it completes.
+
+    Runs are numbered in the order of the parameter combinations, iteration
+    after iteration, so that a run has the same id and iteration whichever
+    process runs it, and in a resumed sweep.
+    """
+    values = _parameter_values(parameters)
+    parameters_list = [dict(zip(parameters, combo)) for combo in product(*values)]
+    positions = list(product(*(range(len(v)) for v in values)))
+    kwargs_list = parameters_list * iterations
     process_func = partial(
         _model_run_func,
         model_cls,
@@ -75,36 +297,409 @@ def batch_run(
         data_collection_period=data_collection_period,
     )
 
-    total_iterations = len(kwargs_list)
-    run_counter = count()
+    def _iteration(run_id):
+        return run_id // len(parameters_list)
+
+    sweep_journal = None
+    if journal is not None:
+        sweep_journal = _SweepJournal(journal, resume)
+        try:
+            sweep_journal.check_settings(
+                {
+                    "model": f"{model_cls.__module__}.{model_cls.__qualname__}",
+                    "parameter names": list(parameters),
+                    **{
+                        f"values of {name}": param_values
+                        for name, param_values in zip(parameters, values)
+                    },
+                    "max_steps": max_steps,
+                    "data_collection_period": data_collection_period,
+                },
+                iterations,
+            )
+        except BaseException:
+            sweep_journal.close()
+            raise
+    elif resume:
+        raise ValueError("A journal is required to resume a batch run.")
+    if seed is None and sweep_journal is not None and sweep_journal.entropy:
+        entropy = sweep_journal.entropy
+    else:
+        entropy = np.random.SeedSequence(seed).entropy
+    if sweep_journal is not None:
+        sweep_journal.entropy = entropy
+    seeds = [
+        kwargs["seed"]
+        if "seed" in kwargs
+        else _run_seed(entropy, kwargs, _iteration(run_id))
+        for run_id, kwargs in enumerate(kwargs_list)
+    ]
+    keys = [
+        (positions[run_id % len(positions)], _iteration(run_id), seeds[run_id])
+        for run_id in range(len(kwargs_list))
+    ]
 
-    results: List[Dict[str, Any]] = []
+    total_iterations = len(kwargs_list)
 
     with tqdm(total_iterations, disable=not display_progress) as pbar:
-        iteration_counter: Counter[Tuple[Any, ...]] = Counter()
-
-        def _fn(paramValues, rawdata):
-            iteration_counter[paramValues] += 1
-            iteration = iteration_counter[paramValues]
-            run_id = next(run_counter)
-            data = []
-            for run_data in rawdata:
-                out = {"RunId": run_id, "iteration": iteration - 1}
-                out.update(run_data)
-                data.append(out)
-            results.extend(data)
+
+        def _fn(run_id, rawdata):
+            if sweep_journal is not None:
+                sweep_journal.write(keys[run_id], rawdata)
             pbar.update()
+            return run_id, _iteration(run_id), seeds[run_id], rawdata
 
-        if number_processes == 1:
-            for kwargs in kwargs_list:
-                paramValues, rawdata = process_func(kwargs)
-                _fn(paramValues, rawdata)
-        else:
-            with Pool(number_processes) as p:
-                for paramValues, rawdata in p.imap_unordered(process_func, kwargs_list):
-                    _fn(paramValues, rawdata)
+        try:
+            tasks = []
+            for run_id, kwargs in enumerate(kwargs_list):
+                if sweep_journal is not None and keys[run_id] in sweep_journal:
+                    pbar.update()
+                    rawdata = sweep_journal.read(keys[run_id])
+                    yield run_id, _iteration(run_id), seeds[run_id], rawdata
+                else:
+                    tasks.append((run_id, kwargs, seeds[run_id]))
+
+            if pool is None and number_processes == 1:
+                for task in tasks:
+                    run_id, rawdata = _run_task(process_func, False, task)
+                    yield _fn(run_id, rawdata)
+            elif tasks:
+                if pool is None or number_processes != 1:
+                    processes = number_processes or cpu_count()
+                else:
+                    # The default number_processes does not describe a pool.
+                    processes = cpu_count()
+                chunksize = chunksize or _chunksize(len(tasks), processes)
+                if shared_memory and os.name == "posix":
+                    from multiprocessing import resource_tracker
+
+                    # Start the tracker of shared memory blocks before forking
+                    # the workers, so that the blocks they create are tracked
+                    # by the parent's tracker, which unlinks the ones left
+                    # over when the parent exits.
+                    resource_tracker.ensure_running()
+                task_func = partial(_run_task, process_func, shared_memory)
+                with nullcontext(pool) if pool is not None else Pool(processes) as p:
+                    results = p.imap_unordered(task_func, tasks, chunksize)
+                    try:
+                        for run_id, rawdata in results:
+                            block = None
+                            if shared_memory:
+                                block, rawdata = _attach_shared_data(*rawdata)
+                            try:
+                                yield _fn(run_id, rawdata)
+                            finally:
+                                if block is not None:
+                                    _release_shared_data(block, rawdata)
+                    finally:
+                        if shared_memory:
+                            _discard_shared_results(results)
+        finally:
+            if sweep_journal is not None:
+                sweep_journal.close()
+
+
+class _SweepJournal:
+    """Append-only file of the collected data of the finished runs of a
+    sweep, keyed by their position in the parameter grid, iteration and seed.
+
+    Each record is written and flushed to disk as soon as its run is over,
+    and only the position of the records is kept in memory. A record left
+    incomplete by an interrupted sweep is dropped when the journal is opened
+    again. Keys only identify runs within a sweep, so the journal also
+    records the settings of the sweep, which a resumed sweep must match.
+    """
 
-    return results
+    _HEADER = struct.Struct("<QQ")
+
+    def __init__(self, path: str, resume: bool) -> None:
+        self.path = path
+        self._positions: Dict[Any, Tuple[int, int]] = {}
+        if os.path.exists(path):
+            if not resume:
+                raise FileExistsError(
+                    f"{path} already exists; pass resume=True to resume its sweep."
+                )
+            self._scan(path)
+        self._file = open(path, "ab")
+        self._reader = open(path, "rb")
+
+    # Keys of the records of the entropy of the sweep's seed and of the
+    # settings of the sweep.
+    _ENTROPY_KEY = ("entropy",)
+    _SETTINGS_KEY = ("settings",)
+
+    def check_settings(self, settings: Dict[str, Any], iterations: int) -> None:
+        """Record the settings and number of iterations of the sweep, or
+        check them against the ones recorded already.
+
+        Settings are compared by a digest of their pickled values, since
+        parameter values may not compare by value (e.g. arrays). The number
+        of iterations may grow, as the runs recorded stay valid.
+        """
+        digests = {name: _digest(value) for name, value in settings.items()}
+        if self._SETTINGS_KEY in self._positions:
+            recorded, recorded_iterations = self.read(self._SETTINGS_KEY)
+            changed = [
+                name
+                for name in {**recorded, **digests}
+                if recorded.get(name) != digests.get(name)
+            ]
+            if iterations < recorded_iterations:
+                changed.append("iterations")
+            if changed:
+                raise ValueError(
+                    f"{self.path} records a sweep with other settings: "
+                    f"{', '.join(changed)} changed."
+                )
+            if iterations == recorded_iterations:
+                return
+        self.write(self._SETTINGS_KEY, (digests, iterations))
+
+    @property
+    def entropy(self) -> Optional[int]:
+        if self._ENTROPY_KEY not in self._positions:
+            return None
+        return self.read(self._ENTROPY_KEY)
+
+    @entropy.setter
+    def entropy(self, entropy: int) -> None:
+        if self.entropy != entropy:
+            self.write(self._ENTROPY_KEY, entropy)
+
+    def _scan(self, path: str) -> None:
+        size = os.path.getsize(path)
+        end = 0
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(self._HEADER.size)
+                if len(header) < self._HEADER.size:
+                    break
+                key_size, data_size = self._HEADER.unpack(header)
+                position = f.tell() + key_size
+                if position + data_size > size:
+                    break
+                try:
+                    key = pickle.loads(f.read(key_size))
+                except Exception:
+                    break
+                f.seek(data_size, os.SEEK_CUR)
+                self._positions[key] = (position, data_size)
+                end = f.tell()
+        if end < size:
+            with open(path, "r+b") as f:
+                f.truncate(end)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._positions
+
+    def read(self, key: Any) -> Any:
+        position, data_size = self._positions[key]
+        self._reader.seek(position)
+        return pickle.loads(self._reader.read(data_size))
+
+    def write(self, key: Any, data: Any) -> None:
+        key_bytes = pickle.dumps(key)
+        data_bytes = pickle.dumps(data)
+        self._file.write(self._HEADER.pack(len(key_bytes), len(data_bytes)))
+        self._file.write(key_bytes)
+        position = self._file.tell()
+        self._file.write(data_bytes)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._positions[key] = (position, len(data_bytes))
+
+    def close(self) -> None:
+        self._file.close()
+        self._reader.close()
+
+
+# Names of the shared memory blocks created by the worker process running
+# _run_task that the parent may not have unlinked yet.
+_worker_blocks: Optional[List[str]] = None
+
+
+class _SharedArray(NamedTuple):
+    """Location of an agent column in the shared memory block of a run."""
+
+    offset: int
+    dtype: str
+    length: int
+
+
+def _run_task(
+    process_func: Callable[..., Tuple[Tuple[Any, ...], Any]],
+    shared_memory: bool,
+    task: Tuple[int, Dict[str, Any], Any],
+) -> Tuple[int, Any]:
+    """Run a single model run of a batch run, and return its id with its
+    collected data.
+
+    With shared_memory, the numeric agent columns of the data are moved to a
+    shared memory block, whose name is returned with the data. The parent
+    process unlinks the block once it has read it.
+    """
+    run_id, kwargs, seed = task
+    _, data = process_func(kwargs, seed=seed)
+    if not shared_memory:
+        return run_id, data
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    columns = [
+        (agent_data, name, values)
+        for _, agent_data in data
+        for name, values in agent_data.items()
+        if values.dtype.kind in "biuf"
+    ]
+    if not columns:
+        return run_id, (None, data)
+    # Keep each column 8-byte aligned.
+    size = sum(-(-values.nbytes // 8) * 8 for _, _, values in columns)
+    global _worker_blocks
+    if _worker_blocks is None:
+        _worker_blocks = []
+        multiprocessing.util.Finalize(None, _forget_unlinked_blocks, exitpriority=0)
+    _forget_unlinked_blocks()
+    # The block stays registered with the resource tracker until the parent
+    # unlinks it, so that it is freed even if the parent never reads it.
+    block = SharedMemory(create=True, size=size)
+    _worker_blocks.append(block.name)
+    offset = 0
+    for agent_data, name, values in columns:
+        view = np.ndarray(values.shape, values.dtype, buffer=block.buf, offset=offset)
+        view[:] = values
+        agent_data[name] = _SharedArray(offset, values.dtype.str, len(values))
+        offset += -(-values.nbytes // 8) * 8
+    del view
+    block.close()
+    return run_id, (block.name, data)
+
+
+def _forget_unlinked_blocks() -> None:
+    """Unregister the blocks of the worker process that the parent has
+    unlinked from the worker's resource tracker.
+
+    The parent's unlink unregisters a block from the parent's tracker, which
+    the worker shares unless it was forked before the tracker started (e.g.
+    in a pool passed to batch_run). Registering the block again before
+    unregistering it balances the calls either way.
+    """
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+
+    for name in list(_worker_blocks or ()):
+        try:
+            SharedMemory(name=name).close()
+        except FileNotFoundError:
+            if os.name == "posix":
+                resource_tracker.register("/" + name, "shared_memory")
+                resource_tracker.unregister("/" + name, "shared_memory")
+            _worker_blocks.remove(name)
+
+
+def _attach_shared_data(name: Optional[str], data: Any) -> Tuple[Any, Any]:
+    """Replace the shared agent columns of the data of a run by arrays backed
+    by its shared memory block, and return the block with the data.
+    """
+    if name is None:
+        return None, data
+    from multiprocessing.shared_memory import SharedMemory
+
+    block = SharedMemory(name=name)
+    for _, agent_data in data:
+        for column, values in agent_data.items():
+            if isinstance(values, _SharedArray):
+                agent_data[column] = np.ndarray(
+                    values.length,
+                    np.dtype(values.dtype),
+                    buffer=block.buf,
+                    offset=values.offset,
+                )
+    return block, data
+
+
+def _discard_shared_results(results: Iterator[Tuple[int, Any]]) -> None:
+    """Free the shared memory blocks of the results of a sweep that the
+    workers have sent back already but that were not read.
+    """
+    while True:
+        try:
+            _, rawdata = results.next(timeout=0)
+        except (StopIteration, multiprocessing.TimeoutError):
+            return
+        except Exception:
+            # A failed run, which has no block.
+            continue
+        block, rawdata = _attach_shared_data(*rawdata)
+        if block is not None:
+            _release_shared_data(block, rawdata)
+
+
+def _release_shared_data(block: Any, data: Any) -> None:
+    """Drop the arrays backed by the shared memory block of a run, and free
+    the block.
+    """
+    for _, agent_data in data:
+        agent_data.clear()
+    block.unlink()
+    try:
+        block.close()
+    except BufferError:
+        # Some arrays viewing the block are still referenced; the block is
+        # unmapped when they are garbage collected.
+        pass
+
+
+def _run_seed(entropy: int, kwargs: Dict[str, Any], iteration: int) -> int:
+    """Derive the seed of a run from the entropy of the sweep, the run's
+    parameters and its iteration, SeedSequence-style: the seeds of runs with
+    different parameters or iterations are independent, and a run gets the
+    same seed whatever the other runs of the sweep are.
+
+    The parameters are hashed by their pickled values (see _digest), which,
+    unlike their repr or hash, are the same in every process.
+    """
+    digest = _digest(sorted(kwargs.items()))
+    spawn_key = (iteration, int(digest[:32], 16))
+    sequence = np.random.SeedSequence(entropy, spawn_key=spawn_key)
+    # Keep seeds within int64, e.g. to store them in Parquet.
+    return int(sequence.generate_state(1, np.uint64)[0] >> np.uint64(1))
+
+
+def _digest(value: Any) -> str:
+    """Return a digest of a value that is the same for equal values in other
+    processes, unless they cannot be pickled.
+    """
+    try:
+        data = pickle.dumps(value, protocol=4)
+    except Exception:
+        data = repr(value).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def _chunksize(n_runs: int, processes: int) -> int:
+    """Return the number of runs to send to a worker process at once, so that
+    each process gets about four chunks.
+    """
+    return max(1, n_runs // (4 * processes))
+
+
+def _parameter_values(
+    parameters: Mapping[str, Union[Any, Iterable[Any]]]
+) -> List[List[Any]]:
+    """Return the list of values each parameter takes in a sweep."""
+    values_list = []
+    for values in parameters.values():
+        if isinstance(values, str):
+            # The values is a single string, so we shouldn't iterate over it.
+            values_list.append([values])
+        else:
+            try:
+                values_list.append(list(values))
+            except TypeError:
+                values_list.append([values])
+    return values_list
 
 
 def _make_model_kwargs(
@@ -122,19 +717,8 @@ def _make_model_kwargs(
     List[Dict[str, Any]]
         A list of all kwargs combinations.
     """
-    parameter_list = []
-    for param, values in parameters.items():
-        if isinstance(values, str):
-            # The values is a single string, so we shouldn't iterate over it.
-            all_values = [(param, values)]
-        else:
-            try:
-                all_values = [(param, value) for value in values]
-            except TypeError:
-                all_values = [(param, values)]
-        parameter_list.append(all_values)
-    all_kwargs = itertools.product(*parameter_list)
-    kwargs_list = [dict(kwargs) for kwargs in all_kwargs]
+    all_kwargs = itertools.product(*_parameter_values(parameters))
+    kwargs_list = [dict(zip(parameters, kwargs)) for kwargs in all_kwargs]
     return kwargs_list
 
 
@@ -143,7 +727,8 @@ def _model_run_func(
     kwargs: Dict[str, Any],
     max_steps: int,
     data_collection_period: int,
-) -> Tuple[Tuple[Any, ...], List[Dict[str, Any]]]:
+    seed: Any = None,
+) -> Tuple[Tuple[Any, ...], List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
     """Run a single model run and collect model and agent data.
 
     Parameters
@@ -156,13 +741,25 @@ def _model_run_func(
         Maximum number of model steps after which the model halts, by default 1000
     data_collection_period : int
         Number of steps after which data gets collected
+    seed : Any, optional
+        Seed of the model's random number generator, by default None. It is
+        given to the model's __new__ only, so that the model's __init__ need
+        not accept it.
 
     Returns
     -------
-    Tuple[Tuple[Any, ...], List[Dict[str, Any]]]
-        Return model_data, agent_data from the reporters
+    Tuple[Tuple[Any, ...], List[Tuple[Dict[str, Any], Dict[str, Any]]]]
+        Return the model parameter values, and for each collected step the
+        model data (with the step and parameters) and the agent data, as
+        arrays of agent ids and reporter values. The columns are much
+        cheaper to send back from a worker process than a dict per agent.
     """
-    model = model_cls(**kwargs)
+    if seed is None:
+        model = model_cls(**kwargs)
+    else:
+        model = model_cls.__new__(model_cls, **{**kwargs, "seed": seed})
+        if isinstance(model, model_cls):
+            model.__init__(**kwargs)
     while model.running and model.schedule.steps <= max_steps:
         model.step()
 
@@ -172,19 +769,15 @@ def _model_run_func(
     if not steps or steps[-1] != model.schedule.steps - 1:
         steps.append(model.schedule.steps - 1)
 
+    if model.datacollector.sink is None:
+        collect = partial(_collect_data, model)
+    else:
+        # The records flushed to the sink are no longer kept by the
+        # datacollector: read them back from the sink.
+        collect = _sink_data_reader(model)
     for step in steps:
-        model_data, all_agents_data = _collect_data(model, step)
-
-        # If there are agent_reporters, then create an entry for each agent
-        if all_agents_data:
-            stepdata = [
-                {**{"Step": step}, **kwargs, **model_data, **agent_data}
-                for agent_data in all_agents_data
-            ]
-        # If there is only model data, then create a single entry for the step
-        else:
-            stepdata = [{**{"Step": step}, **kwargs, **model_data}]
-        data.extend(stepdata)
+        model_data, agent_data = collect(step)
+        data.append(({**{"Step": step}, **kwargs, **model_data}, agent_data))
 
     return tuple(kwargs.values()), data
 
@@ -192,19 +785,47 @@ def _model_run_func(
 def _collect_data(
     model: Model,
     step: int,
-) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """Collect model and agent data from a model using mesas datacollector."""
     dc = model.datacollector
 
     model_data = {param: values[step] for param, values in dc.model_vars.items()}
 
-    all_agents_data = []
-    raw_agent_data = dc._agent_records.get(step, [])
-    for data in raw_agent_data:
-        agent_dict = {"AgentID": data[1]}
-        agent_dict.update(zip(dc.agent_reporters, data[2:]))
-        all_agents_data.append(agent_dict)
-    return model_data, all_agents_data
+    try:
+        agent_data = dc._get_agent_step_columns(step)
+    except KeyError:
+        agent_data = {}
+    if agent_data and not len(agent_data["AgentID"]):
+        agent_data = {}
+    return model_data, agent_data
+
+
+def _sink_data_reader(
+    model: Model,
+) -> Callable[[int], Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Return a function collecting the model and agent data of a step like
+    _collect_data, from all the records of a model's datacollector, including
+    the ones it has written to its sink.
+    """
+    dc = model.datacollector
+    model_df = dc.get_model_vars_dataframe()
+    model_vars = {name: model_df[name].tolist() for name in dc.model_reporters}
+    agent_df = dc._read_sink("agent", dc._agent_frame())
+    agent_rows = agent_df.groupby("Step").indices if len(agent_df) else {}
+    agent_columns = {
+        name: agent_df[name].to_numpy()
+        for name in ["AgentID"] + list(dc.agent_reporters)
+    }
+
+    def collect(step: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        model_data = {param: values[step] for param, values in model_vars.items()}
+        rows = agent_rows.get(step)
+        if rows is None or not len(rows):
+            return model_data, {}
+        agent_data = {name: values[rows] for name, values in agent_columns.items()}
+        return model_data, agent_data
+
+    return collect
 
 
 class ParameterError(TypeError):
@@ -24,8 +24,28 @@ The DataCollector then stores the data it collects in dictionaries:
     * model_vars maps each reporter to a list of its values
     * tables maps each table to a dictionary, with each column as a key with a
       list as its value.
-    * _agent_records maps each model step to a list of each agents id
-      and its values.
+    * agent records are kept in one typed NumPy column per agent reporter,
+      plus one for the agent ids and the range of rows of each step;
+      _agent_records maps each model step to a list of each agents id and
+      its values, read from these columns.
+
+A DataCollector can be given a sink (see DataSink), to which it writes its
+model and agent records every few collections; only the records collected
+since the last write are then kept in memory, and the get_*_dataframe
+methods read the earlier ones back from the sink. ParquetSink writes them to
+Parquet files, and requires pyarrow.
+
+Agent reporters can also be ArrayReporter objects, which compute the values
+of all the agents from the list of agents, with one call per collection.
+
+Model reporters can also be AttributeCount objects, which count the agents
+whose attribute has a given value from a scheduler index kept up to date as
+agents change, instead of scanning the agents at every collection.
+
+Agent records can be decimated by collection policies (see
+CollectionPolicy), which decide at which steps agents are recorded, and
+which agents: EveryK, Predicate, Subsample and OnChange. Agents left out by
+a policy are not reported on at all.
 
 Finally, DataCollector can create a pandas DataFrame from each collection.
 
@@ -35,12 +55,355 @@ The default DataCollector here makes several assumptions:
     * For collecting agent-level variables, agents must have a unique_id
 
 """
+from collections.abc import Mapping
 from functools import partial
-import itertools
 from operator import attrgetter
+import numpy as np
+import os
 import pandas as pd
+import random
 import types
 
+# Kinds of dtypes a column keeps when new values have another dtype of the same
+# group: booleans only combine with booleans, numbers with numbers.
+_DTYPE_GROUPS = {"b": "b", "i": "n", "u": "n", "f": "n"}
+
+
+def _to_column(values):
+    """Convert a sequence of reporter values to a 1-d array: numeric if all
+    values are booleans or numbers, of objects otherwise.
+
+    """
+    try:
+        array = np.array(values)
+    except (TypeError, ValueError):
+        array = None
+    if array is not None and array.ndim == 1 and array.dtype.kind in _DTYPE_GROUPS:
+        return array
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+class _Column:
+    """Growable typed NumPy column, which promotes its dtype as new values
+    require.
+
+    """
+
+    def __init__(self):
+        self.data = None
+        self.size = 0
+
+    def extend(self, values):
+        array = _to_column(values)
+        end = self.size + len(array)
+        if self.data is None:
+            self.data = np.empty(max(16, end), dtype=array.dtype)
+        elif array.dtype != self.data.dtype:
+            group = _DTYPE_GROUPS.get(self.data.dtype.kind)
+            if group is not None and group == _DTYPE_GROUPS.get(array.dtype.kind):
+                dtype = np.result_type(self.data.dtype, array.dtype)
+            else:
+                dtype = np.dtype(object)
+            if dtype != self.data.dtype:
+                self.data = self.data.astype(dtype)
+        if end > len(self.data):
+            data = np.empty(max(end, 2 * len(self.data)), dtype=self.data.dtype)
+            data[: self.size] = self.data[: self.size]
+            self.data = data
+        self.data[self.size : end] = array
+        self.size = end
+
+    def truncate(self, size):
+        self.size = min(self.size, size)
+
+    def values(self, start=0, end=None):
+        if self.data is None:
+            return np.empty(0, dtype=object)
+        end = self.size if end is None else end
+        return self.data[start:end]
+
+
+class _AgentRecords(Mapping):
+    """Read-only mapping of each collected step to its agent records, as
+    (step, agent id, *values) tuples.
+
+    """
+
+    def __init__(self, datacollector):
+        self._datacollector = datacollector
+
+    def __getitem__(self, step):
+        columns = self._datacollector._get_agent_step_columns(step).values()
+        return [(step,) + row for row in zip(*(c.tolist() for c in columns))]
+
+    def __iter__(self):
+        return iter(self._datacollector._agent_step_rows)
+
+    def __len__(self):
+        return len(self._datacollector._agent_step_rows)
+
+
+class AttributeCount:
+    """Model reporter counting the agents of the schedule whose attribute
+    equals a value.
+
+    The count comes from a secondary index of the model's scheduler (see
+    BaseScheduler.add_index), created on first use, so collecting it costs
+    the same whatever the number of agents. The attribute must be tracked,
+    i.e. listed in the agents' tracked_attributes or declared as an
+    AgentAttribute. For example:
+
+        DataCollector({"Infected": AttributeCount("state", State.INFECTED)})
+
+    """
+
+    def __init__(self, attribute, value):
+        """Create a new count reporter.
+
+        Args:
+            attribute: Name of the agent attribute to count by.
+            value: Value of the attribute to count.
+        """
+        self.attribute = attribute
+        self.value = value
+
+    def __call__(self, model):
+        schedule = model.schedule
+        schedule.add_index(self.attribute)
+        return schedule.count_by(self.attribute, self.value)
+
+    def __repr__(self):
+        return f"AttributeCount({self.attribute!r}, {self.value!r})"
+
+
+class ArrayReporter:
+    """Agent reporter computing the values of all the recorded agents at once.
+
+    The function is called once per collection with the list of agents to
+    record, and must return a sequence (e.g. a NumPy array) with one value
+    per agent, in the same order. For example:
+
+        DataCollector(agent_reporters={"x": ArrayReporter(
+            lambda agents: [agent.pos[0] for agent in agents]
+        )})
+
+    """
+
+    def __init__(self, function):
+        """Create a new array reporter.
+
+        Args:
+            function: Function taking a list of agents and returning their
+                      values.
+        """
+        self.function = function
+
+    def __call__(self, agents):
+        values = self.function(agents)
+        if len(values) != len(agents):
+            raise ValueError(
+                f"Array reporter returned {len(values)} values for "
+                f"{len(agents)} agents."
+            )
+        return values
+
+
+class CollectionPolicy:
+    """Base class of the policies deciding which agent records a
+    DataCollector keeps.
+
+    At each collection, the DataCollector first asks every policy whether to
+    record the agents at all (collects), then lets each policy narrow down
+    the agents to report on (select), and finally to drop records from the
+    values reported (filter). The default implementations keep everything.
+
+    """
+
+    def collects(self, model):
+        """Return whether to record the agents at the model's current step."""
+        return True
+
+    def select(self, model, agents):
+        """Return the list of agents to report on, out of a list of agents."""
+        return agents
+
+    def filter(self, columns):
+        """Return the agent records to keep.
+
+        Args:
+            columns: List of lists of values, the agent ids followed by the
+                     values of each agent reporter.
+        """
+        return columns
+
+
+class EveryK(CollectionPolicy):
+    """Record the agents every k steps, at the steps equal to offset modulo k."""
+
+    def __init__(self, k, offset=0):
+        if k < 1:
+            raise ValueError("k must be at least 1.")
+        self.k = k
+        self.offset = offset
+
+    def collects(self, model):
+        return (model.schedule.steps - self.offset) % self.k == 0
+
+
+class Predicate(CollectionPolicy):
+    """Record the agents at the steps for which a function of the model
+    returns True, e.g. Predicate(lambda m: m.outbreak).
+
+    """
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def collects(self, model):
+        return bool(self.predicate(model))
+
+
+class Subsample(CollectionPolicy):
+    """Record a random sample of m of the agents at each collection, or all
+    of them if there are no more than m.
+
+    The sample is drawn from the policy's own random number generator, so
+    that collecting does not change the course of the model.
+
+    """
+
+    def __init__(self, m, seed=None):
+        """Create a new subsample policy.
+
+        Args:
+            m: Number of agents to record.
+            seed: Seed of the random number generator of the policy.
+        """
+        self.m = m
+        self.random = random.Random(seed)
+
+    def select(self, model, agents):
+        if len(agents) <= self.m:
+            return agents
+        positions = sorted(self.random.sample(range(len(agents)), self.m))
+        return [agents[i] for i in positions]
+
+
+class OnChange(CollectionPolicy):
+    """Record an agent only when its reported values differ from the ones
+    last recorded for it, so that the records of an agent hold its values
+    from their step until the step of its next record.
+
+    """
+
+    def __init__(self):
+        self._last_values = {}
+
+    def filter(self, columns):
+        last_values = self._last_values
+        kept = []
+        for i, (agent_id, values) in enumerate(zip(columns[0], zip(*columns[1:]))):
+            if agent_id not in last_values or last_values[agent_id] != values:
+                last_values[agent_id] = values
+                kept.append(i)
+        if len(kept) == len(columns[0]):
+            return columns
+        return [[column[i] for i in kept] for column in columns]
+
+
+class DataSink:
+    """Base class of the stores to which a DataCollector writes its records.
+
+    The DataCollector calls write with a DataFrame of the records collected
+    since its last write, for each of its record tables: "model" for the
+    model variables, and "agent" for the agent variables, with Step and
+    AgentID columns. It does so every flush_every collections, and when its
+    flush method is called.
+
+    """
+
+    flush_every = 100
+
+    def write(self, table, df):
+        """Store a chunk of records.
+
+        Args:
+            table: Name of the record table, "model" or "agent".
+            df: DataFrame of the records to append to the table.
+        """
+        raise NotImplementedError
+
+    def read(self, table, columns=None):
+        """Iterate over the chunks of records of a table, in the order they
+        were written, as DataFrames.
+
+        Args:
+            table: Name of the record table, "model" or "agent".
+            columns: Names of the columns to read, or None to read them all.
+        """
+        raise NotImplementedError
+
+
+class ParquetSink(DataSink):
+    """Sink writing each chunk of records to a Parquet file.
+
+    The chunks of a table are written to <path>/<table>/part-<n>.parquet, and
+    only read back when asked for, so they can be read one at a time, e.g.:
+
+        for chunk in sink.read("agent", columns=["Step", "Wealth"]):
+            ...
+
+    Requires pyarrow (pip install Mesa[parquet]). Agent reporter values must
+    be representable in Arrow, e.g. numbers, booleans or strings.
+
+    """
+
+    def __init__(self, path, flush_every=100, overwrite=False):
+        """Create a new Parquet sink.
+
+        Args:
+            path: Directory to write the Parquet files to, created if missing.
+            flush_every: Number of collections between two writes.
+            overwrite: Whether to remove the Parquet files already written to
+                       path by a previous sink; otherwise they raise an error.
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as error:
+            raise ImportError(
+                "ParquetSink requires pyarrow, which can be installed with "
+                "pip install Mesa[parquet]"
+            ) from error
+        self.path = path
+        self.flush_every = flush_every
+        self._parts = {}
+        for table in ("model", "agent"):
+            for part in self._part_paths(table):
+                if not overwrite:
+                    raise FileExistsError(f"{part} already exists.")
+                os.remove(part)
+
+    def _part_paths(self, table):
+        directory = os.path.join(self.path, table)
+        if not os.path.isdir(directory):
+            return []
+        return [
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.startswith("part-") and name.endswith(".parquet")
+        ]
+
+    def write(self, table, df):
+        directory = os.path.join(self.path, table)
+        os.makedirs(directory, exist_ok=True)
+        part = self._parts.get(table, 0)
+        df.to_parquet(os.path.join(directory, f"part-{part:06d}.parquet"), index=False)
+        self._parts[table] = part + 1
+
+    def read(self, table, columns=None):
+        for part in self._part_paths(table):
+            yield pd.read_parquet(part, columns=columns)
+
 
 class DataCollector:
     """Class for collecting data generated by a Mesa model.
@@ -55,7 +418,14 @@ class DataCollector:
 
     model = None
 
-    def __init__(self, model_reporters=None, agent_reporters=None, tables=None):
+    def __init__(
+        self,
+        model_reporters=None,
+        agent_reporters=None,
+        tables=None,
+        sink=None,
+        agent_policies=None,
+    ):
         """Instantiate a DataCollector with lists of model and agent reporters.
         Both model_reporters and agent_reporters accept a dictionary mapping a
         variable name to either an attribute name, or a method.
@@ -78,15 +448,27 @@ class DataCollector:
             model_reporters: Dictionary of reporter names and attributes/funcs
             agent_reporters: Dictionary of reporter names and attributes/funcs.
             tables: Dictionary of table names to lists of column names.
+            sink: DataSink to write the model and agent records to as they
+                  are collected, instead of keeping them all in memory. The
+                  model_vars and _agent_records attributes then only hold
+                  the records collected since the last write.
+            agent_policies: List of CollectionPolicy objects, all of which
+                            must agree for an agent to be recorded. Model
+                            reporters are still collected at every call of
+                            collect.
 
         Notes:
             If you want to pickle your model you must not use lambda functions.
-            If your model includes a large number of agents, you should *only*
-            use attribute names for the agent reporter, it will be much faster.
+            If your model includes a large number of agents, you should use
+            attribute names or ArrayReporter objects for the agent reporters,
+            rather than functions called on each agent; it will be much
+            faster.
 
-            Model reporters can take four types of arguments:
+            Model reporters can take five types of arguments:
             lambda like above:
             {"agent_count": lambda m: m.schedule.get_agent_count() }
+            counts of agents by the value of a tracked attribute
+            {"infected": AttributeCount("state", "infected")}
             method with @property decorators
             {"agent_count": schedule.get_agent_count()
             class attributes of model
@@ -99,8 +481,15 @@ class DataCollector:
         self.agent_reporters = {}
 
         self.model_vars = {}
-        self._agent_records = {}
         self.tables = {}
+        # Agent records: one column per reporter, plus the agent ids and the
+        # range of rows of each step.
+        self._agent_ids = _Column()
+        self._agent_columns = {}
+        self._agent_step_rows = {}
+        self.sink = sink
+        self._collects_since_flush = 0
+        self.agent_policies = list(agent_policies or [])
 
         if model_reporters is not None:
             for name, reporter in model_reporters.items():
@@ -141,6 +530,7 @@ class DataCollector:
             reporter = partial(self._getattr, reporter)
             reporter.attribute_name = attribute_name
         self.agent_reporters[name] = reporter
+        self._agent_columns[name] = _Column()
 
     def _new_table(self, table_name, table_columns):
         """Add a new table that objects can write to.
@@ -154,21 +544,32 @@ class DataCollector:
         self.tables[table_name] = new_table
 
     def _record_agents(self, model):
-        """Record agents data in a mapping of functions and agents."""
-        rep_funcs = self.agent_reporters.values()
-        if all([hasattr(rep, "attribute_name") for rep in rep_funcs]):
-            prefix = ["model.schedule.steps", "unique_id"]
-            attributes = [func.attribute_name for func in rep_funcs]
-            get_reports = attrgetter(*prefix + attributes)
-        else:
-
-            def get_reports(agent):
-                _prefix = (agent.model.schedule.steps, agent.unique_id)
-                reports = tuple(rep(agent) for rep in rep_funcs)
-                return _prefix + reports
-
-        agent_records = map(get_reports, model.schedule.agents)
-        return agent_records
+        """Record agents data as one list of values per agent reporter, after
+        the list of agent ids.
+
+        """
+        agents = list(model.schedule.agents)
+        for policy in self.agent_policies:
+            agents = policy.select(model, agents)
+        columns = [list(map(attrgetter("unique_id"), agents))]
+        for reporter in self.agent_reporters.values():
+            columns.append(self._report_agents(reporter, agents))
+        for policy in self.agent_policies:
+            columns = policy.filter(columns)
+        return columns
+
+    @staticmethod
+    def _report_agents(reporter, agents):
+        """Return the values of an agent reporter for a list of agents."""
+        if isinstance(reporter, ArrayReporter):
+            return reporter(agents)
+        if hasattr(reporter, "attribute_name"):
+            try:
+                return list(map(attrgetter(reporter.attribute_name), agents))
+            except AttributeError:
+                # Some agents lack the attribute: report None for them.
+                pass
+        return list(map(reporter, agents))
 
     def _reporter_decorator(self, reporter):
         return reporter()
@@ -184,15 +585,96 @@ class DataCollector:
                 # Check if model attribute
                 elif isinstance(reporter, partial):
                     self.model_vars[var].append(reporter(model))
+                # Check if attribute count
+                elif isinstance(reporter, AttributeCount):
+                    self.model_vars[var].append(reporter(model))
                 # Check if function with arguments
                 elif isinstance(reporter, list):
                     self.model_vars[var].append(reporter[0](*reporter[1]))
                 else:
                     self.model_vars[var].append(self._reporter_decorator(reporter))
 
-        if self.agent_reporters:
-            agent_records = self._record_agents(model)
-            self._agent_records[model.schedule.steps] = list(agent_records)
+        if self.agent_reporters and all(
+            policy.collects(model) for policy in self.agent_policies
+        ):
+            agent_columns = self._record_agents(model)
+            self._store_agent_records(model.schedule.steps, agent_columns)
+
+        if self.sink is not None:
+            self._collects_since_flush += 1
+            if self._collects_since_flush >= self.sink.flush_every:
+                self.flush()
+
+    def flush(self):
+        """Write the records collected since the last write to the sink, and
+        drop them from memory.
+
+        """
+        if self.sink is None:
+            return
+        if any(self.model_vars.values()):
+            self.sink.write("model", pd.DataFrame(self.model_vars))
+            for values in self.model_vars.values():
+                values.clear()
+        if self._agent_step_rows:
+            self.sink.write("agent", self._agent_frame())
+            self._agent_ids = _Column()
+            self._agent_columns = {name: _Column() for name in self._agent_columns}
+            self._agent_step_rows = {}
+        self._collects_since_flush = 0
+
+    @property
+    def _agent_records(self):
+        return _AgentRecords(self)
+
+    def _get_agent_step_columns(self, step):
+        """Return the agent records of a step as a dictionary of arrays, the
+        agent ids under "AgentID" followed by the values of each reporter.
+
+        Raises KeyError if no agent records are kept for the step.
+        """
+        start, end = self._agent_step_rows[step]
+        columns = {"AgentID": self._agent_ids.values(start, end)}
+        for name, column in self._agent_columns.items():
+            columns[name] = column.values(start, end)
+        return columns
+
+    def _store_agent_records(self, step, columns):
+        """Append the values of a step to the agent columns, replacing any
+        records collected before for the same step.
+
+        """
+        if step in self._agent_step_rows:
+            start, end = self._agent_step_rows[step]
+            if end == self._agent_ids.size:
+                self._truncate_agent_records(start)
+            else:
+                self._drop_agent_records(step)
+        start = self._agent_ids.size
+        if columns[0]:
+            self._agent_ids.extend(columns[0])
+            for column, values in zip(self._agent_columns.values(), columns[1:]):
+                column.extend(values)
+        self._agent_step_rows[step] = (start, self._agent_ids.size)
+
+    def _truncate_agent_records(self, size):
+        self._agent_ids.truncate(size)
+        for column in self._agent_columns.values():
+            column.truncate(size)
+
+    def _drop_agent_records(self, step):
+        """Remove the records of a step from the middle of the columns."""
+        start, end = self._agent_step_rows.pop(step)
+        kept = [self._agent_ids] + list(self._agent_columns.values())
+        tails = [column.values(end).copy() for column in kept]
+        self._truncate_agent_records(start)
+        for column, tail in zip(kept, tails):
+            if len(tail):
+                column.extend(tail)
+        for other, (other_start, other_end) in self._agent_step_rows.items():
+            if other_start >= end:
+                shift = end - start
+                self._agent_step_rows[other] = (other_start - shift, other_end - shift)
 
     def add_table_row(self, table_name, row, ignore_missing=False):
         """Add a row dictionary to a specific table.
@@ -227,7 +709,33 @@ class DataCollector:
         (implicitly) the model tick.
 
         """
-        return pd.DataFrame(self.model_vars)
+        return self._read_sink("model", pd.DataFrame(self.model_vars))
+
+    def _agent_frame(self):
+        """Create a DataFrame of the agent records kept in memory."""
+        steps = list(self._agent_step_rows)
+        counts = [end - start for start, end in self._agent_step_rows.values()]
+        data = {
+            "Step": np.repeat(np.array(steps, dtype=np.int64), counts),
+            "AgentID": self._agent_ids.values(),
+        }
+        for name, column in self._agent_columns.items():
+            data[name] = column.values()
+        return pd.DataFrame(data, copy=False)
+
+    def _read_sink(self, table, df):
+        """Prepend the records of a table written to the sink, if any, to a
+        DataFrame of the records kept in memory.
+
+        """
+        if self.sink is None:
+            return df
+        chunks = list(self.sink.read(table))
+        if not chunks:
+            return df
+        if len(df):
+            chunks.append(df)
+        return pd.concat(chunks, ignore_index=True)
 
     def get_agent_vars_dataframe(self):
         """Create a pandas DataFrame from the agent variables.
@@ -236,13 +744,7 @@ class DataCollector:
         columns for tick and agent_id.
 
         """
-        all_records = itertools.chain.from_iterable(self._agent_records.values())
-        rep_names = list(self.agent_reporters)
-
-        df = pd.DataFrame.from_records(
-            data=all_records,
-            columns=["Step", "AgentID"] + rep_names,
-        )
+        df = self._read_sink("agent", self._agent_frame())
         df = df.set_index(["Step", "AgentID"])
         return df
 
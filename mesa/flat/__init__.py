@@ -3,4 +3,4 @@ from mesa.time import *  # noqa
 from mesa.space import *  # noqa
 from mesa.datacollection import *  # noqa
 from .visualization import *  # noqa
-from mesa.batchrunner import batch_run  # noqa
+from mesa.batchrunner import batch_run, batch_run_iter  # noqa
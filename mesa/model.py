@@ -10,20 +10,26 @@ from __future__ import annotations
 
 import random
 
+from mesa.agent import AttributeStore
 from mesa.datacollection import DataCollector
 
 # mypy
-from typing import Any
+from typing import Any, Callable
 
 
 class Model:
     """Base class for models."""
 
     def __new__(cls, *args: Any, **kwargs: Any) -> Any:
-        """Create a new model object and instantiate its RNG automatically."""
-        cls._seed = kwargs.get("seed", None)
-        cls.random = random.Random(cls._seed)
-        return object.__new__(cls)
+        """Create a new model object and instantiate its RNG automatically.
+
+        The RNG belongs to the model object, so that models of the same class
+        (e.g. the runs of a batch run) draw independent random numbers.
+        """
+        model = object.__new__(cls)
+        model._seed = kwargs.get("seed", None)
+        model.random = random.Random(model._seed)
+        return model
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """Create a new model. Overload this method with the actual code to
@@ -68,6 +74,46 @@ class Model:
         self.random.seed(seed)
         self._seed = seed
 
+    def get_attribute_store(self, agent_class: type) -> AttributeStore:
+        """Return the store of an agent class's AgentAttribute fields.
+
+        The store is created when the first agent of the class is.
+
+        Args:
+            agent_class: Agent subclass declaring AgentAttribute fields.
+        """
+        # Models do not always call Model.__init__, hence the lazy setup.
+        stores = self.__dict__.setdefault("_attribute_stores", {})
+        if agent_class not in stores:
+            stores[agent_class] = AttributeStore(agent_class._attribute_fields)
+        return stores[agent_class]
+
+    def add_attribute_listener(
+        self, name: str, listener: Callable[[Any, Any, Any], None]
+    ) -> None:
+        """Call listener(agent, old, new) whenever an agent of the model
+        assigns a tracked attribute.
+
+        Only TrackedAttribute and AgentAttribute fields report changes; old is
+        None when the attribute had no value yet.
+
+        Args:
+            name: Name of the attribute.
+            listener: Function called with the agent, the previous value and
+                      the new value.
+        """
+        listeners = self.__dict__.setdefault("_attribute_listeners", {})
+        listeners.setdefault(name, []).append(listener)
+
+    def remove_attribute_listener(
+        self, name: str, listener: Callable[[Any, Any, Any], None]
+    ) -> None:
+        """Stop calling a listener added with add_attribute_listener."""
+        listeners = self.__dict__.get("_attribute_listeners", {})
+        listeners[name].remove(listener)
+        if not listeners[name]:
+            del listeners[name]
+
     def initialize_data_collector(
         self, model_reporters=None, agent_reporters=None, tables=None
     ) -> None:
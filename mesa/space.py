@@ -4,7 +4,8 @@ Mesa Space Module
 
 Objects used to add a spatial component to a model.
 
-Grid: base grid, a simple list-of-lists.
+Grid: base grid, a simple list-of-lists, optionally mirrored by a NumPy
+      occupancy array.
 SingleGrid: grid which strictly enforces one object per cell.
 MultiGrid: extension to Grid where each cell is a set of objects.
 
@@ -19,6 +20,8 @@ from __future__ import annotations
 
 import itertools
 import math
+from collections import OrderedDict
+from functools import lru_cache
 from warnings import warn
 
 import numpy as np
@@ -82,6 +85,153 @@ def is_integer(x: Real) -> bool:
     return isinstance(x, (int, np.integer))
 
 
+# Rows of the neighbor tables are built in blocks of this many cells, when
+# get_neighborhood first asks for one of them.
+_TABLE_BLOCK_CELLS = 4096
+# Neighborhood configurations whose table would take more than this many
+# bytes for the whole grid get no table; their rows are computed on demand.
+_MAX_TABLE_BYTES = 64 * 2**20
+
+
+def _unique_candidates(
+    candidates: npt.NDArray[np.int32], sentinel: int
+) -> npt.NDArray[np.int32]:
+    """Sort each row of a candidate index array, drop duplicates and move
+    the `sentinel` entries (no cell) to the end of the row.
+
+    The result is trimmed to the widest row.
+    """
+    candidates = np.sort(candidates, axis=1)
+    duplicate = candidates[:, 1:] == candidates[:, :-1]
+    candidates[:, 1:][duplicate] = sentinel
+    candidates.sort(axis=1)
+    width = int((candidates < sentinel).sum(axis=1).max(initial=0))
+    return candidates[:, :width]
+
+
+def _table_from_candidates(
+    candidates: npt.NDArray[np.int32], sentinel: int
+) -> Tuple[npt.NDArray[np.int32], npt.NDArray[np.intp]]:
+    """Build a compact neighbor table and the length of each of its rows
+    from candidate flat indices, where `sentinel` marks entries that are
+    not a cell."""
+    candidates = _unique_candidates(candidates, sentinel)
+    valid = candidates < sentinel
+    table = np.where(valid, candidates, 0).astype(np.int32, copy=False)
+    return table, valid.sum(axis=1)
+
+
+class NeighborhoodCache:
+    """Unbounded cache of neighborhood coordinate lists.
+
+    Grids consult their cache before materializing a neighborhood from the
+    neighbor tables. Subclasses implement other policies; all of them count
+    hits and misses so that it is possible to check whether caching pays
+    off for a given model.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Any, List[Coordinate]] = dict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self) -> int:
+        """Number of lookups answered from the cache."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Number of lookups that were not in the cache."""
+        return self._misses
+
+    @property
+    def size(self) -> int:
+        """Number of neighborhoods currently stored."""
+        return len(self._entries)
+
+    def get(self, key: Any) -> List[Coordinate] | None:
+        """Return the cached neighborhood for key, or None."""
+        neighborhood = self._entries.get(key)
+        if neighborhood is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return neighborhood
+
+    def put(self, key: Any, neighborhood: List[Coordinate]) -> None:
+        """Store a neighborhood."""
+        self._entries[key] = neighborhood
+
+    def clear(self) -> None:
+        """Drop all stored neighborhoods and reset the counters."""
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+class LRUNeighborhoodCache(NeighborhoodCache):
+    """Neighborhood cache holding at most `max_entries` neighborhoods,
+    evicting the least recently used one when full."""
+
+    def __init__(self, max_entries: int = 65536) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        super().__init__()
+        self._entries: OrderedDict[Any, List[Coordinate]] = OrderedDict()
+        self.max_entries = max_entries
+        self._evictions = 0
+
+    @property
+    def evictions(self) -> int:
+        """Number of neighborhoods dropped to respect max_entries."""
+        return self._evictions
+
+    def get(self, key: Any) -> List[Coordinate] | None:
+        neighborhood = self._entries.get(key)
+        if neighborhood is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+            self._entries.move_to_end(key)
+        return neighborhood
+
+    def put(self, key: Any, neighborhood: List[Coordinate]) -> None:
+        self._entries[key] = neighborhood
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        super().clear()
+        self._evictions = 0
+
+
+class NullNeighborhoodCache(NeighborhoodCache):
+    """Neighborhood cache that stores nothing; every lookup is a miss."""
+
+    def put(self, key: Any, neighborhood: List[Coordinate]) -> None:
+        pass
+
+
+def _make_neighborhood_cache(
+    policy: NeighborhoodCache | str | None,
+) -> NeighborhoodCache:
+    """Turn the `neighborhood_cache` argument of Grid into a cache object."""
+    if isinstance(policy, NeighborhoodCache):
+        return policy
+    if policy is None or policy == "lru":
+        return LRUNeighborhoodCache()
+    if policy == "unbounded":
+        return NeighborhoodCache()
+    if policy == "disabled":
+        return NullNeighborhoodCache()
+    raise ValueError(
+        f"Unknown neighborhood cache policy {policy!r}; expected a "
+        "NeighborhoodCache or one of 'lru', 'unbounded' and 'disabled'."
+    )
+
+
 class Grid:
     """Base class for a square grid.
 
@@ -93,14 +243,32 @@ class Grid:
         width, height: The grid's width and height.
         torus: Boolean which determines whether to treat the grid as a torus.
         grid: Internal list-of-lists which holds the grid cells themselves.
+        occupancy: Array with the number of agents in each cell.
+        neighborhood_cache: Cache in front of the neighbor tables.
     """
 
-    def __init__(self, width: int, height: int, torus: bool) -> None:
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        torus: bool,
+        track_occupancy: bool = False,
+        neighborhood_cache: NeighborhoodCache | str | None = None,
+    ) -> None:
         """Create a new grid.
 
         Args:
             width, height: The width and height of the grid
             torus: Boolean whether the grid wraps or not.
+            track_occupancy: If True, keep a (width, height) NumPy array with
+                             the number of agents in each cell in sync with
+                             the grid, so that whole-grid queries (occupancy,
+                             neighbor_counts, ...) read it instead of
+                             building it from the positions of the agents.
+            neighborhood_cache: Policy for caching neighborhood coordinate
+                                lists: a NeighborhoodCache instance, or one
+                                of "lru" (the default, at most 65536
+                                neighborhoods), "unbounded" and "disabled".
         """
         self.height = height
         self.width = width
@@ -116,9 +284,23 @@ class Grid:
 
         # Add all cells to the empties list.
         self.empties = set(itertools.product(*(range(self.width), range(self.height))))
-
-        # Neighborhood Cache
-        self._neighborhood_cache: Dict[Any, List[Coordinate]] = dict()
+        # The cells holding agents, so that whole-grid queries without the
+        # occupancy array cost time proportional to the agents, not the cells.
+        self._occupied: Set[Coordinate] = set()
+
+        # Optional array mirror of the number of agents in each cell.
+        self._occupancy: npt.NDArray[np.int32] | None = None
+        if track_occupancy:
+            self._occupancy = np.zeros((self.width, self.height), dtype=np.int32)
+
+        # Blocks of neighbor table rows, built lazily for each neighborhood
+        # configuration: (moore, include_center, radius) -> block number ->
+        # (table, row lengths).
+        self._neighborhood_tables: Dict[
+            Tuple[bool, bool, int],
+            Dict[int, Tuple[npt.NDArray[np.int32], npt.NDArray[np.intp]]],
+        ] = dict()
+        self.neighborhood_cache = _make_neighborhood_cache(neighborhood_cache)
 
     @staticmethod
     def default_val() -> None:
@@ -186,6 +368,41 @@ class Grid:
 
         raise IndexError
 
+    @property
+    def occupancy(self) -> npt.NDArray[np.int32]:
+        """Number of agents in each cell, indexed by [x, y].
+
+        If the grid was created with `track_occupancy=True` this is a
+        read-only view of the array maintained on placement and removal;
+        otherwise a new array is built from the occupied cells on every
+        access.
+        """
+        if self._occupancy is not None:
+            view = self._occupancy.view()
+            view.flags.writeable = False
+            return view
+        occupancy = np.zeros((self.width, self.height), dtype=np.int32)
+        cells = self._occupied_cells()
+        if cells:
+            grid = self.grid
+            occupancy[tuple(np.array(cells).T)] = [
+                self._cell_count(grid[x][y]) for x, y in cells
+            ]
+        return occupancy
+
+    @staticmethod
+    def _cell_count(cell: GridContent) -> int:
+        """Number of agents held by a cell's contents."""
+        return 0 if cell is None else 1
+
+    def empty_mask(self) -> npt.NDArray[np.bool_]:
+        """Return a boolean (width, height) array that is True for empty cells."""
+        return self.occupancy == 0
+
+    def density(self) -> float:
+        """Return the fraction of cells that hold at least one agent."""
+        return float(np.count_nonzero(self.occupancy)) / (self.width * self.height)
+
     def __iter__(self) -> Iterator[GridContent]:
         """Create an iterator that chains the rows of the grid together
         as if it is one list:"""
@@ -266,34 +483,170 @@ class Grid:
             if not including the center).
         """
         cache_key = (pos, moore, include_center, radius)
-        neighborhood = self._neighborhood_cache.get(cache_key, None)
+        neighborhood = self.neighborhood_cache.get(cache_key)
 
         if neighborhood is None:
-            coordinates: Set[Coordinate] = set()
+            if self.out_of_bounds(pos):
+                if not self.torus:
+                    neighborhood = self._outside_neighborhood(
+                        pos, moore, include_center, radius
+                    )
+                    self.neighborhood_cache.put(cache_key, neighborhood)
+                    return neighborhood
+                pos = self.torus_adj(pos)
+
+            if self._use_neighborhood_table(moore, include_center, radius):
+                x, y = pos
+                row = self._neighborhood_row(
+                    x * self.height + y, moore, include_center, radius
+                )
+                height = self.height
+                neighborhood = [divmod(i, height) for i in row.tolist()]
+            else:
+                neighborhood = self._compute_neighborhood(
+                    pos, moore, include_center, radius
+                )
+            self.neighborhood_cache.put(cache_key, neighborhood)
 
-            x, y = pos
-            for dy in range(-radius, radius + 1):
-                for dx in range(-radius, radius + 1):
-                    if dx == 0 and dy == 0 and not include_center:
-                        continue
-                    # Skip coordinates that are outside manhattan distance
-                    if not moore and abs(dx) + abs(dy) > radius:
-                        continue
+        return neighborhood
 
-                    coord = (x + dx, y + dy)
+    def _outside_neighborhood(
+        self, pos: Coordinate, moore: bool, include_center: bool, radius: int
+    ) -> List[Coordinate]:
+        """Neighborhood of a point outside a non-toroidal grid, which has no
+        row in the neighbor tables."""
+        return self._compute_neighborhood(pos, moore, include_center, radius)
 
-                    if self.out_of_bounds(coord):
-                        # Skip if not a torus and new coords out of bounds.
-                        if not self.torus:
-                            continue
-                        coord = self.torus_adj(coord)
+    def _compute_neighborhood(
+        self, pos: Coordinate, moore: bool, include_center: bool, radius: int
+    ) -> List[Coordinate]:
+        """Neighborhood of a cell of a configuration without a neighbor
+        table, in the order of the table rows."""
+        x, y = pos
+        offsets = self._neighborhood_offsets(moore, include_center, radius)
+        if self.torus:
+            width, height = self.width, self.height
+            # Offsets may wrap onto the same cell on small tori.
+            return sorted({((x + dx) % width, (y + dy) % height) for dx, dy in offsets})
+        return [
+            (x + dx, y + dy)
+            for dx, dy in offsets
+            if 0 <= x + dx < self.width and 0 <= y + dy < self.height
+        ]
 
-                    coordinates.add(coord)
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _neighborhood_offsets(
+        moore: bool, include_center: bool, radius: int
+    ) -> Tuple[Coordinate, ...]:
+        """Return the (dx, dy) offsets of a neighborhood configuration."""
+        return tuple(
+            (dx, dy)
+            for dx in range(-radius, radius + 1)
+            for dy in range(-radius, radius + 1)
+            if (include_center or dx != 0 or dy != 0)
+            and (moore or abs(dx) + abs(dy) <= radius)
+        )
 
-            neighborhood = sorted(coordinates)
-            self._neighborhood_cache[cache_key] = neighborhood
+    def _neighborhood_size(self, moore: bool, include_center: bool, radius: int) -> int:
+        """Upper bound on the number of cells in a neighborhood."""
+        return len(self._neighborhood_offsets(moore, include_center, radius))
 
-        return neighborhood
+    def _neighborhood_row(
+        self, index: int, moore: bool, include_center: bool, radius: int
+    ) -> npt.NDArray[np.int32]:
+        """Return the flat indices of the neighbors of the cell at a flat
+        index, in ascending order, i.e. in the order of the sorted
+        coordinates.
+
+        The row comes from the block of the neighbor table holding the cell,
+        which is built on first use.
+        """
+        block, offset = divmod(index, _TABLE_BLOCK_CELLS)
+        table, lengths = self._neighborhood_block(block, moore, include_center, radius)
+        return table[offset, : lengths[offset]]
+
+    def _use_neighborhood_table(
+        self, moore: bool, include_center: bool, radius: int
+    ) -> bool:
+        """Whether the neighbor table of a configuration is small enough to
+        keep."""
+        size = self._neighborhood_size(moore, include_center, radius)
+        return 4 * size * self.width * self.height <= _MAX_TABLE_BYTES
+
+    def _neighborhood_block(
+        self, block: int, moore: bool, include_center: bool, radius: int
+    ) -> Tuple[npt.NDArray[np.int32], npt.NDArray[np.intp]]:
+        """Return a block of rows of the neighbor table of a configuration,
+        building it on first use.
+
+        Row i of block b holds the neighbors of the cell at flat index
+        `b * _TABLE_BLOCK_CELLS + i`, followed by padding; the number of
+        neighbors of each cell is returned as well.
+        """
+        key = (moore, include_center, radius)
+        blocks = self._neighborhood_tables.setdefault(key, dict())
+        tables = blocks.get(block)
+        if tables is None:
+            start = block * _TABLE_BLOCK_CELLS
+            end = min(start + _TABLE_BLOCK_CELLS, self.width * self.height)
+            cells = np.arange(start, end, dtype=np.int32)
+            tables = self._build_neighborhood_table(cells, *key)
+            blocks[block] = tables
+        return tables
+
+    def _neighborhood_blocks(
+        self, moore: bool, include_center: bool, radius: int
+    ) -> Iterator[Tuple[int, npt.NDArray[np.int32], npt.NDArray[np.intp]]]:
+        """Yield the first flat index, rows and row lengths of every block of
+        the neighbor table of a configuration.
+
+        Blocks of configurations too large for a table are built, used and
+        dropped one at a time.
+        """
+        n_cells = self.width * self.height
+        keep = self._use_neighborhood_table(moore, include_center, radius)
+        for block, start in enumerate(range(0, n_cells, _TABLE_BLOCK_CELLS)):
+            if keep:
+                table, lengths = self._neighborhood_block(
+                    block, moore, include_center, radius
+                )
+            else:
+                cells = np.arange(
+                    start, min(start + _TABLE_BLOCK_CELLS, n_cells), dtype=np.int32
+                )
+                table, lengths = self._build_neighborhood_table(
+                    cells, moore, include_center, radius
+                )
+            yield start, table, lengths
+
+    def _build_neighborhood_table(
+        self,
+        cells: npt.NDArray[np.int32],
+        moore: bool,
+        include_center: bool,
+        radius: int,
+    ) -> Tuple[npt.NDArray[np.int32], npt.NDArray[np.intp]]:
+        """Compute the neighbor table rows of the cells at some flat indices
+        for a configuration."""
+        dxs, dys = np.array(
+            self._neighborhood_offsets(moore, include_center, radius), dtype=np.int32
+        ).T
+        xs, ys = np.divmod(cells, self.height)
+        candidates = self._flat_indices(
+            xs[:, np.newaxis] + dxs, ys[:, np.newaxis] + dys
+        )
+        return _table_from_candidates(candidates, self.width * self.height)
+
+    def _flat_indices(
+        self, xs: npt.NDArray[np.int32], ys: npt.NDArray[np.int32]
+    ) -> npt.NDArray[np.int32]:
+        """Convert coordinate arrays to flat cell indices, wrapping them on a
+        torus and mapping cells outside the grid to width * height."""
+        if self.torus:
+            return (xs % self.width) * self.height + ys % self.height
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        return np.where(inside, xs * self.height + ys, self.width * self.height)
 
     def iter_neighbors(
         self,
@@ -350,6 +703,80 @@ class Grid:
         """
         return list(self.iter_neighbors(pos, moore, include_center, radius))
 
+    def neighbor_counts(
+        self,
+        layer: npt.ArrayLike | Callable[[Agent], bool] | None = None,
+        moore: bool = True,
+        include_center: bool = False,
+        radius: int = 1,
+    ) -> npt.NDArray[Any]:
+        """Sum a per-cell layer over the neighborhood of every cell at once.
+
+        Args:
+            layer: A (width, height) array of per-cell values, or a predicate
+                   called on every agent on the grid, in which case each cell
+                   counts the agents satisfying it. If None, the occupancy
+                   of each cell is used, which is only read without a pass
+                   over the agents if the grid tracks it (see
+                   track_occupancy).
+            moore: If True, use the Moore neighborhood (including diagonals)
+                   If False, use the Von Neumann neighborhood.
+            include_center: If True, include each cell's own value.
+            radius: radius, in cells, of the neighborhood.
+
+        Returns:
+            A (width, height) array where entry [x, y] is the sum of the layer
+            over the cells that `get_neighborhood((x, y), ...)` returns.
+        """
+        values = self._layer_values(layer)
+        offsets = self._neighborhood_offsets(moore, include_center, radius)
+        counts = np.zeros_like(values)
+
+        if self.torus:
+            # Offsets that wrap onto the same cell only count once, as in
+            # get_neighborhood.
+            wrapped = {(dx % self.width, dy % self.height) for dx, dy in offsets}
+            for dx, dy in wrapped:
+                counts += np.roll(values, (-dx, -dy), axis=(0, 1))
+        else:
+            padded = np.pad(values, radius)
+            for dx, dy in offsets:
+                counts += padded[
+                    radius + dx : radius + dx + self.width,
+                    radius + dy : radius + dy + self.height,
+                ]
+        return counts
+
+    def _layer_values(
+        self, layer: npt.ArrayLike | Callable[[Agent], bool] | None
+    ) -> npt.NDArray[Any]:
+        """Turn the `layer` argument of neighbor_counts into a (width, height) array."""
+        if layer is None:
+            return self.occupancy.astype(np.int_)
+        if callable(layer):
+            values = np.zeros((self.width, self.height), dtype=np.int_)
+            positions = [
+                agent.pos
+                for agent in self.iter_cell_list_contents(self._occupied_cells())
+                if layer(agent)
+            ]
+            if positions:
+                np.add.at(values, tuple(np.array(positions).T), 1)
+            return values
+        values = np.asarray(layer)
+        if values.shape != (self.width, self.height):
+            raise ValueError(
+                f"Layer of shape {values.shape} does not match the grid "
+                f"shape {(self.width, self.height)}."
+            )
+        if values.dtype == np.bool_:
+            values = values.astype(np.int_)
+        return values
+
+    def _occupied_cells(self) -> List[Coordinate]:
+        """Return the coordinates of all non-empty cells."""
+        return list(self._occupied)
+
     def torus_adj(self, pos: Coordinate) -> Coordinate:
         """Convert coordinate, handling torus looping."""
         if not self.out_of_bounds(pos):
@@ -420,6 +847,9 @@ class Grid:
         x, y = pos
         self.grid[x][y] = agent
         self.empties.discard(pos)
+        self._occupied.add(pos)
+        if self._occupancy is not None:
+            self._occupancy[x, y] = 1
 
     def remove_agent(self, agent: Agent) -> None:
         """Remove the agent from the grid and set its pos attribute to None."""
@@ -427,6 +857,9 @@ class Grid:
         x, y = pos
         self.grid[x][y] = self.default_val()
         self.empties.add(pos)
+        self._occupied.discard(pos)
+        if self._occupancy is not None:
+            self._occupancy[x, y] = 0
         agent.pos = None
 
     def is_cell_empty(self, pos: Coordinate) -> bool:
@@ -561,20 +994,31 @@ class MultiGrid(Grid):
         """Default value for new cell elements."""
         return []
 
+    @staticmethod
+    def _cell_count(cell: MultiGridContent) -> int:
+        """Number of agents held by a cell's contents."""
+        return len(cell)
+
     def _place_agent(self, agent: Agent, pos: Coordinate) -> None:
         """Place the agent at the correct location."""
         x, y = pos
         if agent not in self.grid[x][y]:
             self.grid[x][y].append(agent)
+            if self._occupancy is not None:
+                self._occupancy[x, y] += 1
         self.empties.discard(pos)
+        self._occupied.add(pos)
 
     def remove_agent(self, agent: Agent) -> None:
         """Remove the agent from the given location and set its pos attribute to None."""
         pos = agent.pos
         x, y = pos
         self.grid[x][y].remove(agent)
+        if self._occupancy is not None:
+            self._occupancy[x, y] -= 1
         if self.is_cell_empty(pos):
             self.empties.add(pos)
+            self._occupied.discard(pos)
         agent.pos = None
 
     @accept_tuple_argument
@@ -591,9 +1035,7 @@ class MultiGrid(Grid):
             A iterator of the contents of the cells identified in cell_list
 
         """
-        return itertools.chain.from_iterable(
-            self[x][y] for x, y in cell_list if not self.is_cell_empty((x, y))
-        )
+        return itertools.chain.from_iterable(self.grid[x][y] for x, y in cell_list)
 
 
 class HexGrid(Grid):
@@ -632,49 +1074,77 @@ class HexGrid(Grid):
             equals at most 9 (8) if Moore, 5 (4) if Von Neumann (if not
             including the center).
         """
+        yield from self.get_neighborhood(pos, include_center, radius)
 
-        def torus_adj_2d(pos: Coordinate) -> Coordinate:
-            return (pos[0] % self.width, pos[1] % self.height)
-
-        coordinates = set()
-
-        def find_neighbors(pos: Coordinate, radius: int) -> None:
-            x, y = pos
-
-            """
-            Both: (0,-), (0,+)
-
-            Even: (-,+), (-,0), (+,+), (+,0)
-            Odd:  (-,0), (-,-), (+,0), (+,-)
-            """
-            adjacent = [(x, y - 1), (x, y + 1)]
-
-            if include_center:
-                adjacent.append(pos)
+    def _neighborhood_size(self, moore: bool, include_center: bool, radius: int) -> int:
+        """Upper bound on the number of cells in a neighborhood; `moore` is
+        ignored."""
+        return 3 * radius * (radius + 1) + include_center
 
-            if x % 2 == 0:
-                adjacent += [(x - 1, y + 1), (x - 1, y), (x + 1, y + 1), (x + 1, y)]
-            else:
-                adjacent += [(x - 1, y), (x - 1, y - 1), (x + 1, y), (x + 1, y - 1)]
-
-            if self.torus is False:
-                adjacent = list(
-                    filter(lambda coords: not self.out_of_bounds(coords), adjacent)
-                )
-            else:
-                adjacent = [torus_adj_2d(coord) for coord in adjacent]
-
-            coordinates.update(adjacent)
-
-            if radius > 1:
-                [find_neighbors(coords, radius - 1) for coords in adjacent]
+    def _build_neighborhood_table(
+        self,
+        cells: npt.NDArray[np.int32],
+        moore: bool,
+        include_center: bool,
+        radius: int,
+    ) -> Tuple[npt.NDArray[np.int32], npt.NDArray[np.intp]]:
+        """Compute the neighbor table rows of the cells at some flat indices;
+        `moore` is ignored.
+
+        Larger radii are the cells reachable within `radius` steps through
+        adjacent cells.
+        """
+        n_cells = self.width * self.height
+        reached = cells[:, np.newaxis]
+        for _ in range(radius):
+            adjacent = self._adjacent_cells(reached.ravel())
+            candidates = np.hstack([reached, adjacent.reshape(len(cells), -1)])
+            reached = _unique_candidates(candidates, n_cells)
+
+        if not include_center:
+            reached[reached == cells[:, np.newaxis]] = n_cells
+        return _table_from_candidates(reached, n_cells)
+
+    def _compute_neighborhood(
+        self, pos: Coordinate, moore: bool, include_center: bool, radius: int
+    ) -> List[Coordinate]:
+        x, y = pos
+        cells = np.array([x * self.height + y], dtype=np.int32)
+        table, lengths = self._build_neighborhood_table(
+            cells, moore, include_center, radius
+        )
+        height = self.height
+        return [divmod(i, height) for i in table[0, : lengths[0]].tolist()]
 
-        find_neighbors(pos, radius)
+    def _adjacent_cells(self, cells: npt.NDArray[np.int32]) -> npt.NDArray[np.int32]:
+        """Return the flat indices of the cells adjacent to the cells at some
+        flat indices, with width * height for missing cells.
 
-        if not include_center and pos in coordinates:
-            coordinates.remove(pos)
+        Both: (0,-), (0,+)
 
-        yield from coordinates
+        Even: (-,+), (-,0), (+,+), (+,0)
+        Odd:  (-,0), (-,-), (+,0), (+,-)
+        """
+        n_cells = self.width * self.height
+        xs, ys = np.divmod(cells, self.height)
+        even = xs % 2 == 0
+        even_offsets = [(0, -1), (0, 1), (-1, 1), (-1, 0), (1, 1), (1, 0)]
+        odd_offsets = [(0, -1), (0, 1), (-1, 0), (-1, -1), (1, 0), (1, -1)]
+        adjacent = np.empty((len(cells), len(even_offsets)), dtype=np.int32)
+        for column, ((edx, edy), (odx, ody)) in enumerate(
+            zip(even_offsets, odd_offsets)
+        ):
+            adjacent[:, column] = self._flat_indices(
+                xs + np.where(even, edx, odx), ys + np.where(even, edy, ody)
+            )
+        # A missing cell is adjacent only to itself.
+        adjacent[cells == n_cells] = n_cells
+        return adjacent
+
+    def _outside_neighborhood(
+        self, pos: Coordinate, moore: bool, include_center: bool, radius: int
+    ) -> List[Coordinate]:
+        raise ValueError("Point out of bounds, and space non-toroidal.")
 
     def neighbor_iter(self, pos: Coordinate) -> Iterator[Agent]:
         """Iterate over position neighbors.
@@ -705,7 +1175,7 @@ class HexGrid(Grid):
             A list of coordinate tuples representing the neighborhood;
             With radius 1
         """
-        return list(self.iter_neighborhood(pos, include_center, radius))
+        return super().get_neighborhood(pos, True, include_center, radius)
 
     def iter_neighbors(
         self, pos: Coordinate, include_center: bool = False, radius: int = 1
@@ -742,13 +1212,44 @@ class HexGrid(Grid):
         """
         return list(self.iter_neighbors(pos, include_center, radius))
 
+    def neighbor_counts(
+        self,
+        layer: npt.ArrayLike | Callable[[Agent], bool] | None = None,
+        moore: bool = True,
+        include_center: bool = False,
+        radius: int = 1,
+    ) -> npt.NDArray[Any]:
+        """Sum a per-cell layer over the hexagonal neighborhood of every cell
+        at once; `moore` is ignored.
+
+        Hexagonal neighborhoods depend on the column parity, so instead of
+        shifting the layer this gathers it through the neighbor table.
+        """
+        values = self._layer_values(layer)
+        flat_values = values.ravel()
+        counts = np.empty_like(flat_values)
+        for start, table, lengths in self._neighborhood_blocks(
+            True, include_center, radius
+        ):
+            valid = np.arange(table.shape[1]) < lengths[:, np.newaxis]
+            counts[start : start + len(table)] = np.where(
+                valid, flat_values[table], 0
+            ).sum(axis=1)
+        return counts.reshape(self.width, self.height)
+
 
 class ContinuousSpace:
     """Continuous space where each agent can have an arbitrary position.
 
     Assumes that all agents are point objects, and have a pos property storing
     their position as an (x, y) tuple. This class uses a numpy array internally
-    to store agent objects, to speed up neighborhood lookups.
+    to store agent objects, to speed up neighborhood lookups. The array grows
+    by doubling its capacity, and removing an agent moves the last row into
+    its place, so adding and removing agents are both O(1) on average.
+
+    Optionally, agents are also kept in a uniform grid of buckets (a cell
+    list), so that neighbor queries only measure distances to the agents in
+    the buckets overlapping the search radius.
     """
 
     _grid = None
@@ -760,6 +1261,7 @@ class ContinuousSpace:
         torus: bool,
         x_min: float = 0,
         y_min: float = 0,
+        bucket_size: float | None = None,
     ) -> None:
         """Create a new continuous space.
 
@@ -769,6 +1271,10 @@ class ContinuousSpace:
             x_min, y_min: (default 0) If provided, set the minimum x and y
                           coordinates for the space. Below them, values loop to
                           the other edge (if torus=True) or raise an exception.
+            bucket_size: (default None) If provided, index agents in square
+                         buckets at least this wide. Choose it close to the
+                         typical search radius; None disables the index and
+                         neighbor queries check every agent.
         """
         self.x_min = x_min
         self.x_max = x_max
@@ -780,10 +1286,94 @@ class ContinuousSpace:
         self.size = np.array((self.width, self.height))
         self.torus = torus
 
-        self._agent_points: npt.NDArray[FloatCoordinate] | None = None
+        self._points_buffer: npt.NDArray[np.float64] | None = None
         self._index_to_agent: Dict[int, Agent] = {}
         self._agent_to_index: Dict[Agent, int] = {}
 
+        self._buckets: Dict[Tuple[int, int], Set[Agent]] | None = None
+        self._agent_to_bucket: Dict[Agent, Tuple[int, int]] = {}
+        if bucket_size is not None:
+            if bucket_size <= 0:
+                raise ValueError("bucket_size must be positive.")
+            # The buckets tile the space exactly, which keeps the torus
+            # wraparound a matter of taking bucket numbers modulo their count.
+            self._n_buckets = (
+                max(1, int(self.width // bucket_size)),
+                max(1, int(self.height // bucket_size)),
+            )
+            self._bucket_width = self.width / self._n_buckets[0]
+            self._bucket_height = self.height / self._n_buckets[1]
+            self._buckets = {}
+
+    @property
+    def _agent_points(self) -> npt.NDArray[np.float64] | None:
+        """Positions of the agents, row i holding the one at index i."""
+        if self._points_buffer is None:
+            return None
+        return self._points_buffer[: len(self._agent_to_index)]
+
+    def _bucket(self, pos: FloatCoordinate) -> Tuple[int, int]:
+        """Return the bucket containing an in-bounds position."""
+        bx = int((pos[0] - self.x_min) / self._bucket_width)
+        by = int((pos[1] - self.y_min) / self._bucket_height)
+        return min(bx, self._n_buckets[0] - 1), min(by, self._n_buckets[1] - 1)
+
+    def _add_to_bucket(self, agent: Agent, pos: FloatCoordinate) -> None:
+        bucket = self._bucket(pos)
+        self._buckets.setdefault(bucket, set()).add(agent)
+        self._agent_to_bucket[agent] = bucket
+
+    def _remove_from_bucket(self, agent: Agent) -> None:
+        bucket = self._agent_to_bucket.pop(agent)
+        agents = self._buckets[bucket]
+        agents.discard(agent)
+        if not agents:
+            del self._buckets[bucket]
+
+    @staticmethod
+    def _bucket_range(
+        low: float, high: float, origin: float, width: float, n: int, torus: bool
+    ) -> Iterable[int]:
+        """Bucket numbers along one axis overlapping the interval [low, high]."""
+        first = math.floor((low - origin) / width)
+        last = math.floor((high - origin) / width)
+        if torus:
+            if last - first + 1 >= n:
+                return range(n)
+            return [b % n for b in range(first, last + 1)]
+        return range(max(first, 0), min(last, n - 1) + 1)
+
+    def _candidate_indices(
+        self, pos: FloatCoordinate, radius: float
+    ) -> npt.NDArray[np.int_]:
+        """Sorted indices of the agents in the buckets within radius of pos."""
+        x, y = pos
+        xs = self._bucket_range(
+            x - radius,
+            x + radius,
+            self.x_min,
+            self._bucket_width,
+            self._n_buckets[0],
+            self.torus,
+        )
+        ys = self._bucket_range(
+            y - radius,
+            y + radius,
+            self.y_min,
+            self._bucket_height,
+            self._n_buckets[1],
+            self.torus,
+        )
+        buckets = self._buckets
+        agent_to_index = self._agent_to_index
+        indices = [
+            agent_to_index[agent]
+            for bx in xs
+            for by in ys
+            for agent in buckets.get((bx, by), ())
+        ]
+        return np.sort(np.array(indices, dtype=np.int_))
+
     def place_agent(self, agent: Agent, pos: FloatCoordinate) -> None:
         """Place a new agent in the space.
 
@@ -792,12 +1382,18 @@ class ContinuousSpace:
             pos: Coordinate tuple for where to place the agent.
         """
         pos = self.torus_adj(pos)
-        if self._agent_points is None:
-            self._agent_points = np.array([pos])
-        else:
-            self._agent_points = np.append(self._agent_points, np.array([pos]), axis=0)
-        self._index_to_agent[self._agent_points.shape[0] - 1] = agent
-        self._agent_to_index[agent] = self._agent_points.shape[0] - 1
+        idx = len(self._agent_to_index)
+        if self._points_buffer is None:
+            self._points_buffer = np.empty((16, 2))
+        elif idx == len(self._points_buffer):
+            buffer = np.empty((2 * idx, 2))
+            buffer[:idx] = self._points_buffer
+            self._points_buffer = buffer
+        self._points_buffer[idx] = pos
+        self._index_to_agent[idx] = agent
+        self._agent_to_index[agent] = idx
+        if self._buckets is not None:
+            self._add_to_bucket(agent, pos)
         agent.pos = pos
 
     def move_agent(self, agent: Agent, pos: FloatCoordinate) -> None:
@@ -809,8 +1405,13 @@ class ContinuousSpace:
         """
         pos = self.torus_adj(pos)
         idx = self._agent_to_index[agent]
-        self._agent_points[idx, 0] = pos[0]
-        self._agent_points[idx, 1] = pos[1]
+        self._points_buffer[idx] = pos
+        if (
+            self._buckets is not None
+            and self._bucket(pos) != self._agent_to_bucket[agent]
+        ):
+            self._remove_from_bucket(agent)
+            self._add_to_bucket(agent, pos)
         agent.pos = pos
 
     def remove_agent(self, agent: Agent) -> None:
@@ -821,17 +1422,17 @@ class ContinuousSpace:
         """
         if agent not in self._agent_to_index:
             raise Exception("Agent does not exist in the space")
-        idx = self._agent_to_index[agent]
-        del self._agent_to_index[agent]
-        max_idx = max(self._index_to_agent.keys())
-        # Delete the agent's position and decrement the index/agent mapping
-        self._agent_points = np.delete(self._agent_points, idx, axis=0)
-        for a, index in self._agent_to_index.items():
-            if index > idx:
-                self._agent_to_index[a] = index - 1
-                self._index_to_agent[index - 1] = a
-        # The largest index is now redundant
-        del self._index_to_agent[max_idx]
+        idx = self._agent_to_index.pop(agent)
+        last = len(self._agent_to_index)
+        # Fill the gap with the last agent, so no other index changes
+        if idx != last:
+            moved = self._index_to_agent[last]
+            self._points_buffer[idx] = self._points_buffer[last]
+            self._index_to_agent[idx] = moved
+            self._agent_to_index[moved] = idx
+        del self._index_to_agent[last]
+        if self._buckets is not None:
+            self._remove_from_bucket(agent)
         agent.pos = None
 
     def get_neighbors(
@@ -847,15 +1448,138 @@ class ContinuousSpace:
                             neighbors of a given agent, True will include that
                             agent in the results.
         """
-        deltas = np.abs(self._agent_points - np.array(pos))
+        if self._buckets is not None:
+            candidates = self._candidate_indices(pos, radius)
+            if not len(candidates):
+                return []
+            points = self._agent_points[candidates]
+        else:
+            candidates = None
+            points = self._agent_points
+
+        deltas = np.abs(points - np.array(pos))
         if self.torus:
             deltas = np.minimum(deltas, self.size - deltas)
         dists = deltas[:, 0] ** 2 + deltas[:, 1] ** 2
 
-        (idxs,) = np.where(dists <= radius**2)
-        neighbors = [
-            self._index_to_agent[x] for x in idxs if include_center or dists[x] > 0
-        ]
+        within = dists <= radius**2
+        if not include_center:
+            within &= dists > 0
+        (idxs,) = np.where(within)
+        if candidates is not None:
+            idxs = candidates[idxs]
+        index_to_agent = self._index_to_agent
+        neighbors = [index_to_agent[x] for x in idxs.tolist()]
+        return neighbors
+
+    def get_neighbors_batch(
+        self,
+        positions: Sequence[FloatCoordinate] | npt.NDArray[float],
+        radius: float,
+        include_center: bool = True,
+    ) -> List[List[Agent]]:
+        """Get the objects within a certain radius of many points at once.
+
+        Equivalent to calling get_neighbors for each position, but all the
+        queries are answered together with a handful of array operations: the
+        agents are sorted into buckets at least radius wide, and distances are
+        only measured between each point and the agents in the 3x3 block of
+        buckets around it. The bucket_size index is not needed.
+
+        Args:
+            positions: Sequence of (x,y) coordinates, or an (n, 2) array.
+            radius: Get all the objects within this distance of each point.
+            include_center: If True, include objects at the *exact* coordinates
+                            of a point, as in get_neighbors.
+
+        Returns:
+            One list of agents per position, each in the order get_neighbors
+            would return it.
+        """
+        queries = np.asarray(positions, dtype=float).reshape(-1, 2)
+        n_queries = len(queries)
+        points = self._agent_points
+        if points is None or not len(points) or not n_queries:
+            return [[] for _ in range(n_queries)]
+        n_points = len(points)
+        origin = np.array((self.x_min, self.y_min))
+        if self.torus:
+            queries = origin + (queries - origin) % self.size
+
+        # Buckets at least radius wide, so that every neighbor of a point is
+        # in the buckets next to its own. There are never many more buckets
+        # than agents, however small the radius.
+        n_buckets = np.array(
+            [
+                max(1, int(extent // radius)) if radius > 0 else n_points
+                for extent in (self.width, self.height)
+            ]
+        )
+        while n_buckets.prod() > 4 * n_points and n_buckets.max() > 1:
+            n_buckets = np.maximum(n_buckets // 2, 1)
+        bucket_size = self.size / n_buckets
+        nx, ny = n_buckets.tolist()
+
+        agent_cells = np.minimum(
+            np.floor((points - origin) / bucket_size).astype(np.int_), n_buckets - 1
+        )
+        query_cells = np.minimum(
+            np.floor((queries - origin) / bucket_size).astype(np.int_), n_buckets - 1
+        )
+        agent_buckets = agent_cells[:, 0] * ny + agent_cells[:, 1]
+        # A stable sort keeps the agents of each bucket in index order.
+        order = np.argsort(agent_buckets, kind="stable")
+        counts = np.bincount(agent_buckets, minlength=nx * ny)
+        starts = np.cumsum(counts) - counts
+
+        pair_queries = []
+        pair_agents = []
+        for bx, valid_x in self._batch_axis_buckets(query_cells[:, 0], nx):
+            for by, valid_y in self._batch_axis_buckets(query_cells[:, 1], ny):
+                (query_idx,) = np.nonzero(valid_x & valid_y)
+                buckets = bx[query_idx] * ny + by[query_idx]
+                lengths = counts[buckets]
+                # Expand each (point, bucket) pair into one pair per agent.
+                offsets = np.cumsum(lengths) - lengths
+                first = np.repeat(starts[buckets] - offsets, lengths)
+                pair_queries.append(np.repeat(query_idx, lengths))
+                pair_agents.append(order[first + np.arange(lengths.sum())])
+        pair_queries = np.concatenate(pair_queries)
+        pair_agents = np.concatenate(pair_agents)
+
+        deltas = np.abs(points[pair_agents] - queries[pair_queries])
+        if self.torus:
+            deltas = np.minimum(deltas, self.size - deltas)
+        dists = deltas[:, 0] ** 2 + deltas[:, 1] ** 2
+        within = dists <= radius**2
+        if not include_center:
+            within &= dists > 0
+        pair_queries = pair_queries[within]
+        pair_agents = pair_agents[within]
+
+        keys = np.sort(pair_queries * n_points + pair_agents)
+        ends = np.cumsum(np.bincount(pair_queries, minlength=n_queries)).tolist()
+        index_to_agent = self._index_to_agent
+        neighbors = [index_to_agent[x] for x in (keys % n_points).tolist()]
+        return [neighbors[start:end] for start, end in zip([0] + ends, ends)]
+
+    def _batch_axis_buckets(
+        self, cells: npt.NDArray[np.int_], n: int
+    ) -> List[Tuple[npt.NDArray[np.int_], npt.NDArray[np.bool_]]]:
+        """Buckets along one axis next to each point's, and which ones exist."""
+        if self.torus and n < 3:
+            # Stepping one bucket either way would visit some buckets twice.
+            return [
+                (np.full_like(cells, b), np.ones(len(cells), bool)) for b in range(n)
+            ]
+        neighbors = []
+        for step in (-1, 0, 1):
+            buckets = cells + step
+            if self.torus:
+                neighbors.append((buckets % n, np.ones(len(cells), bool)))
+            else:
+                valid = (buckets >= 0) & (buckets < n)
+                neighbors.append((np.where(valid, buckets, 0), valid))
         return neighbors
 
     def get_heading(
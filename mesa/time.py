@@ -25,11 +25,33 @@ Key concepts:
 # Remove this __future__ import once the oldest supported Python is 3.10
 from __future__ import annotations
 
-from collections import OrderedDict, defaultdict
+import heapq
+import inspect
+import itertools
+import multiprocessing
+import operator
+import os
+import random
+import weakref
+from collections import Counter, OrderedDict, defaultdict
+from collections.abc import Sequence
+from functools import partial
+from warnings import warn
 
 # mypy
-from typing import Dict, Iterator, List, Type, Union
-from mesa.agent import Agent
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+from mesa.agent import Agent, AgentAttribute, TrackedAttribute
 from mesa.model import Model
 
 
@@ -38,6 +60,48 @@ from mesa.model import Model
 TimeT = Union[float, int]
 
 
+class AgentView(Sequence):
+    """Read-only, zero-copy view of the agents of a scheduler, in the order
+    they were added.
+
+    Returned by BaseScheduler.agents. It supports len(), iteration, indexing
+    and membership tests. Iterating over it while agents are added or
+    removed behaves like iterating over a copy taken beforehand, except that
+    removed agents are skipped.
+
+    """
+
+    def __init__(self, scheduler: BaseScheduler) -> None:
+        self._scheduler = scheduler
+
+    def __len__(self) -> int:
+        return len(self._scheduler._agents)
+
+    def __iter__(self) -> Iterator[Agent]:
+        scheduler = self._scheduler
+        return scheduler._iter_agents(range(len(scheduler._agent_list)))
+
+    def __getitem__(self, index: Any) -> Any:
+        scheduler = self._scheduler
+        if scheduler._n_removed:
+            scheduler._compact()
+        if scheduler._n_removed:
+            return list(self)[index]
+        return scheduler._agent_list[index]
+
+    def __contains__(self, agent: Any) -> bool:
+        unique_id = getattr(agent, "unique_id", None)
+        return self._scheduler._agents.get(unique_id) is agent
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (AgentView, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AgentView({list(self)!r})"
+
+
 class BaseScheduler:
     """Simplest scheduler; activates agents one at a time, in the order
     they were added.
@@ -54,6 +118,17 @@ class BaseScheduler:
         self.steps = 0
         self.time: TimeT = 0
         self._agents: Dict[int, Agent] = OrderedDict()
+        # The agents in the order they were added. Removed agents leave a
+        # None tombstone until the list is compacted, which only happens
+        # while no iteration over it is in progress.
+        self._agent_list: List[Agent | None] = []
+        self._agent_slots: Dict[int, int] = {}
+        self._n_removed = 0
+        self._iterating = 0
+        # Secondary indexes: attribute name -> value -> unique_id -> agent.
+        self._indexes: Dict[str, Dict[Any, Dict[int, Agent]]] = {}
+        # Whether (agent class, attribute name) is tracked.
+        self._tracked: Dict[Tuple[Type[Agent], str], bool] = {}
 
     def add(self, agent: Agent) -> None:
         """Add an Agent object to the schedule.
@@ -70,6 +145,12 @@ class BaseScheduler:
             )
 
         self._agents[agent.unique_id] = agent
+        self._agent_slots[agent.unique_id] = len(self._agent_list)
+        self._agent_list.append(agent)
+        for attribute, index in self._indexes.items():
+            if self._tracks(type(agent), attribute):
+                value = getattr(agent, attribute, None)
+                index.setdefault(value, {})[agent.unique_id] = agent
 
     def remove(self, agent: Agent) -> None:
         """Remove all instances of a given agent from the schedule.
@@ -79,34 +160,188 @@ class BaseScheduler:
 
         """
         del self._agents[agent.unique_id]
+        self._agent_list[self._agent_slots.pop(agent.unique_id)] = None
+        for attribute, index in self._indexes.items():
+            self._unindex(index, getattr(agent, attribute, None), agent.unique_id)
+        self._n_removed += 1
+        self._compact_if_sparse()
+
+    def add_index(self, attribute: str) -> None:
+        """Index the agents of the schedule by the value of an attribute.
+
+        count_by and agents_by then answer queries on the attribute without
+        scanning the agents. The index follows assignments through the
+        model's attribute listeners, so the attribute must be a
+        TrackedAttribute (see Agent.tracked_attributes) or an AgentAttribute,
+        and its values must be hashable. Agents of classes that do not track
+        the attribute are left out of the index.
+
+        Args:
+            attribute: Name of the agent attribute to index.
+
+        Raises:
+            ValueError: If the schedule has agents, but none of their classes
+                        tracks the attribute.
+
+        """
+        if attribute in self._indexes:
+            return
+        index: Dict[Any, Dict[int, Agent]] = {}
+        for agent in self._agents.values():
+            if self._tracks(type(agent), attribute):
+                value = getattr(agent, attribute, None)
+                index.setdefault(value, {})[agent.unique_id] = agent
+        if self._agents and not index:
+            raise ValueError(
+                f"No agent class of the schedule tracks {attribute}; list it in "
+                "tracked_attributes to index it."
+            )
+        self._indexes[attribute] = index
+        self.model.add_attribute_listener(attribute, partial(self._reindex, attribute))
+
+    def _tracks(self, agent_class: Type[Agent], attribute: str) -> bool:
+        """Whether an agent class reports assignments to an attribute to the
+        attribute listeners."""
+        key = (agent_class, attribute)
+        tracked = self._tracked.get(key)
+        if tracked is None:
+            descriptor = inspect.getattr_static(agent_class, attribute, None)
+            tracked = isinstance(descriptor, (TrackedAttribute, AgentAttribute))
+            self._tracked[key] = tracked
+        return tracked
+
+    @staticmethod
+    def _unindex(
+        index: Dict[Any, Dict[int, Agent]], value: Any, unique_id: int
+    ) -> None:
+        agents = index.get(value)
+        if agents is not None:
+            agents.pop(unique_id, None)
+            if not agents:
+                del index[value]
+
+    def _reindex(self, attribute: str, agent: Agent, old: Any, new: Any) -> None:
+        """Move an agent of the schedule to the entry of its new value."""
+        if self._agents.get(agent.unique_id) is not agent:
+            return
+        index = self._indexes[attribute]
+        self._unindex(index, old, agent.unique_id)
+        index.setdefault(new, {})[agent.unique_id] = agent
+
+    def count_by(self, attribute: str, value: Any) -> int:
+        """Returns the number of agents whose indexed attribute equals value."""
+        return len(self._indexes[attribute].get(value, ()))
+
+    def agents_by(self, attribute: str, value: Any) -> List[Agent]:
+        """Returns the agents whose indexed attribute equals value, in no
+        particular order.
+
+        """
+        return list(self._indexes[attribute].get(value, {}).values())
+
+    def _compact(self) -> None:
+        """Drop the tombstones of removed agents, unless agents are being
+        iterated over.
+
+        """
+        if self._iterating or not self._n_removed:
+            return
+        self._agent_list = [a for a in self._agent_list if a is not None]
+        self._agent_slots = {a.unique_id: i for i, a in enumerate(self._agent_list)}
+        self._n_removed = 0
+
+    def _compact_if_sparse(self) -> None:
+        """Compact the agent list once most of it is tombstones."""
+        if 2 * self._n_removed > len(self._agent_list):
+            self._compact()
+
+    def _iter_agents(self, slots: Iterable[int]) -> Iterator[Agent]:
+        """Return an iterator over the agents at the given positions of the
+        agent list that have not been removed.
+
+        The list is kept from being compacted from now until the iterator is
+        exhausted, closed or garbage collected, so that the positions stay
+        valid even if it is only consumed later. The list is not compacted
+        afterwards either: positions taken before the iteration may be used
+        again by a later pass of the same step, so steps with several passes
+        compact once they are done.
+
+        """
+        release: List[Any] = []
+        iterator = self._yield_agents(slots, release)
+        release.append(weakref.finalize(iterator, self._end_iteration))
+        self._iterating += 1
+        return iterator
+
+    def _yield_agents(
+        self, slots: Iterable[int], release: List[Any]
+    ) -> Iterator[Agent]:
+        try:
+            agent_list = self._agent_list
+            for slot in slots:
+                agent = agent_list[slot]
+                if agent is not None:
+                    yield agent
+        finally:
+            release[0]()
+
+    def _end_iteration(self) -> None:
+        self._iterating -= 1
+
+    def _agents_at(self, slots: List[int] | range) -> Iterator[Agent | None]:
+        """Iterate over the agent list at the given positions, with None for
+        the agents removed since.
+
+        Cheaper than _iter_agents, for the passes of a step, which keep the
+        list from being compacted until all of them are done.
+
+        """
+        if isinstance(slots, range) and slots.start == 0 and slots.step == 1:
+            # Iterating over the list itself still sees the agents removed
+            # during the pass, but not the ones added.
+            return itertools.islice(self._agent_list, slots.stop)
+        return map(self._agent_list.__getitem__, slots)
+
+    def _agent_order(self, shuffled: bool) -> List[int] | range:
+        """Positions of the current agents in the agent list, optionally in
+        random order.
+
+        Shuffling positions instead of agents draws the same random numbers
+        as shuffling a list of the agents would.
+
+        """
+        self._compact()
+        order = range(len(self._agent_list))
+        if shuffled:
+            if self._n_removed:
+                order = [i for i in order if self._agent_list[i] is not None]
+            else:
+                order = list(order)
+            self.model.random.shuffle(order)
+        return order
 
     def step(self) -> None:
         """Execute the step of all the agents, one at a time."""
         for agent in self.agent_buffer(shuffled=False):
             agent.step()
+        self._compact_if_sparse()
         self.steps += 1
         self.time += 1
 
     def get_agent_count(self) -> int:
         """Returns the current number of agents in the queue."""
-        return len(self._agents.keys())
+        return len(self._agents)
 
     @property
-    def agents(self) -> List[Agent]:
-        return list(self._agents.values())
+    def agents(self) -> AgentView:
+        return AgentView(self)
 
     def agent_buffer(self, shuffled: bool = False) -> Iterator[Agent]:
         """Simple generator that yields the agents while letting the user
         remove and/or add agents during stepping.
 
         """
-        agent_keys = list(self._agents.keys())
-        if shuffled:
-            self.model.random.shuffle(agent_keys)
-
-        for key in agent_keys:
-            if key in self._agents:
-                yield self._agents[key]
+        return self._iter_agents(self._agent_order(shuffled))
 
 
 class RandomActivation(BaseScheduler):
@@ -127,10 +362,87 @@ class RandomActivation(BaseScheduler):
         """
         for agent in self.agent_buffer(shuffled=True):
             agent.step()
+        self._compact_if_sparse()
         self.steps += 1
         self.time += 1
 
 
+# Agents, partition bounds and staged attribute names of the schedule whose
+# workers are being started, inherited by the forked workers of
+# SimultaneousActivation.
+_parallel_step: Tuple[Any, ...] | None = None
+
+
+def _set_staged(
+    agents: List[Agent], names: Tuple[str, ...], values: List[Tuple[Any, ...]]
+) -> None:
+    for agent, staged in zip(agents, values):
+        for name, value in zip(names, staged):
+            setattr(agent, name, value)
+
+
+def _partition_worker(connection: Any, partition: int) -> None:
+    """Step the agents of one partition in a forked worker, once per task
+    received, and send back their staged attribute values.
+
+    A task is the seed of the step and the staged values of all the agents
+    at the previous step, if any. The worker first applies those and
+    advances all its agents, as the scheduler did in the parent, so that its
+    copy of the model stays in line.
+
+    """
+    agents, bounds, staged_attributes = _parallel_step
+    start, end = bounds[partition]
+    model = agents[0].model
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        seed, previous = task
+        try:
+            if previous is not None:
+                _set_staged(agents, staged_attributes, previous)
+                for agent in agents:
+                    agent.advance()
+            # Every worker starts from the same RNG states; decorrelate them.
+            model.random.seed(seed + partition)
+            random.seed(seed + partition)
+            results = []
+            for agent in agents[start:end]:
+                agent.step()
+                results.append(
+                    tuple(getattr(agent, name) for name in staged_attributes)
+                )
+        except Exception as exc:
+            connection.send((False, f"{type(exc).__name__}: {exc}"))
+        else:
+            connection.send((True, results))
+    connection.close()
+
+
+def _no_fork_reason() -> str | None:
+    """Return why the current process cannot fork step workers, if it
+    cannot."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return "Processes cannot be forked on this platform"
+    if multiprocessing.current_process().daemon:
+        return "Daemonic processes, e.g. the workers of batch_run, cannot fork"
+    return None
+
+
+def _stop_workers(workers: List[Tuple[Any, Any]]) -> None:
+    """Ask the workers of a SimultaneousActivation to exit and wait for them."""
+    for process, connection in workers:
+        try:
+            connection.send(None)
+        except OSError:
+            pass
+    for process, connection in workers:
+        process.join()
+        connection.close()
+    workers.clear()
+
+
 class SimultaneousActivation(BaseScheduler):
     """A scheduler to simulate the simultaneous activation of all the agents.
 
@@ -138,19 +450,201 @@ class SimultaneousActivation(BaseScheduler):
     step() activates the agent and stages any necessary changes, but does not
     apply them yet. advance() then applies the changes.
 
+    Optionally, the step phase runs in several processes, each stepping a
+    contiguous share of the agents in a copy of the model. step() must then
+    only write to the staged attributes, whose values are copied back to the
+    agents before advance() runs. Each process reseeds the model RNG and the
+    random module from a seed drawn from the model RNG, so runs are
+    reproducible for a given number of processes, but differ from serial
+    runs. Only available where processes can be forked, and not in
+    daemonic processes such as the workers of batch_run; the step phase then
+    runs serially, with a warning.
+
+    The worker processes are forked at the first step and kept for the next
+    ones. They keep their copy of the model in line by running advance() on
+    it with the staged values of each step, so advance() must only depend on
+    those, and the model must not otherwise change between steps. Adding or
+    removing agents restarts the workers; call close() to restart them after
+    any other change, and when the schedule is no longer needed. The
+    schedule is also a context manager that closes it on exit.
+
     """
 
+    def __init__(
+        self,
+        model: Model,
+        processes: int | None = 1,
+        staged_attributes: Iterable[str] = (),
+    ) -> None:
+        """Create an empty SimultaneousActivation schedule.
+
+        Args:
+            model: Model object associated with the schedule.
+            processes: Number of processes to run the step phase in; None
+                       uses one per CPU. 1 runs it serially.
+            staged_attributes: Names of the agent attributes step() writes
+                               to. Required to run in several processes.
+
+        """
+        super().__init__(model)
+        self.processes = os.cpu_count() if processes is None else processes
+        self.staged_attributes = tuple(staged_attributes)
+        if self.processes > 1:
+            if not self.staged_attributes:
+                raise ValueError(
+                    "staged_attributes are required to step in several processes."
+                )
+            self._check_fork()
+        # Worker processes and their connections, the agents they were
+        # forked with, and the staged values they have not advanced yet.
+        self._workers: List[Tuple[Any, Any]] = []
+        self._worker_agents: List[Agent] = []
+        self._unadvanced: List[Tuple[Any, ...]] | None = None
+        self._finalizer = weakref.finalize(self, _stop_workers, self._workers)
+
+    def _check_fork(self) -> None:
+        """Step serially, with a warning, if the current process cannot fork
+        workers."""
+        reason = _no_fork_reason()
+        if reason is not None:
+            warn(
+                f"{reason}; SimultaneousActivation steps agents serially.",
+                RuntimeWarning,
+            )
+            self.processes = 1
+
+    def close(self) -> None:
+        """Stop the worker processes; the next step forks new ones."""
+        _stop_workers(self._workers)
+        self._worker_agents = []
+        self._unadvanced = None
+
+    def __enter__(self) -> SimultaneousActivation:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _start_workers(self, agents: List[Agent]) -> None:
+        """Fork one worker per partition of the agents, unless the current
+        workers were forked with the same agents.
+
+        """
+        global _parallel_step
+        if len(agents) == len(self._worker_agents) and all(
+            map(operator.is_, agents, self._worker_agents)
+        ):
+            return
+        self.close()
+        n_partitions = min(self.processes, len(agents))
+        edges = [len(agents) * i // n_partitions for i in range(n_partitions + 1)]
+        bounds = list(zip(edges[:-1], edges[1:]))
+        _parallel_step = (agents, bounds, self.staged_attributes)
+        try:
+            context = multiprocessing.get_context("fork")
+            for partition in range(n_partitions):
+                connection, child_connection = context.Pipe()
+                process = context.Process(
+                    target=_partition_worker,
+                    args=(child_connection, partition),
+                    daemon=True,
+                )
+                process.start()
+                child_connection.close()
+                self._workers.append((process, connection))
+        finally:
+            _parallel_step = None
+        self._worker_agents = agents
+
+    def _parallel_step_phase(self, agents: List[Agent]) -> None:
+        """Step the agents in the workers and copy back their staged
+        attributes.
+
+        """
+        self._start_workers(agents)
+        seed = self.model.random.getrandbits(32)
+        for _, connection in self._workers:
+            connection.send((seed, self._unadvanced))
+        replies = [connection.recv() for _, connection in self._workers]
+        failed = [message for ok, message in replies if not ok]
+        if failed:
+            self.close()
+            raise RuntimeError(f"Stepping agents in a worker failed: {failed[0]}")
+        staged = [values for _, results in replies for values in results]
+        _set_staged(agents, self.staged_attributes, staged)
+        self._unadvanced = staged
+
     def step(self) -> None:
         """Step all agents, then advance them."""
-        agent_keys = list(self._agents.keys())
-        for agent_key in agent_keys:
-            self._agents[agent_key].step()
-        for agent_key in agent_keys:
-            self._agents[agent_key].advance()
+        order = self._agent_order(shuffled=False)
+        # Both passes use the same positions; keep the list from being
+        # compacted in between.
+        self._iterating += 1
+        try:
+            if self.processes > 1 and not self._workers:
+                # The schedule may have been created in another process,
+                # e.g. before being pickled.
+                self._check_fork()
+            if self.processes > 1 and len(self._agents) > 1:
+                agents = [a for a in self._agents_at(order) if a is not None]
+                self._parallel_step_phase(agents)
+            else:
+                for agent in self._agents_at(order):
+                    if agent is not None:
+                        agent.step()
+            for agent in self._agents_at(order):
+                if agent is not None:
+                    agent.advance()
+        finally:
+            self._iterating -= 1
+        self._compact_if_sparse()
         self.steps += 1
         self.time += 1
 
 
+class BatchStage:
+    """A stage of an agent class that runs once for all the agents of the
+    class, instead of once per agent.
+
+    Create one with the batch_stage decorator.
+
+    """
+
+    def __init__(self, func: Callable[[Type[Agent], List[Agent]], None]) -> None:
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, agent: Agent | None, owner: Type[Agent] | None = None) -> Any:
+        if agent is None:
+            return lambda agents: self.func(owner, agents)
+        # Called on a single agent, e.g. outside a StagedActivation.
+        return lambda: self.func(type(agent), [agent])
+
+
+def batch_stage(func: Callable[[Type[Agent], List[Agent]], None]) -> BatchStage:
+    """Declare a stage method that StagedActivation calls once per step
+    with all the agents of the class, in activation order.
+
+    The method receives the class and a list of agents, and can work on the
+    AttributeStore columns of the class to update them all at once:
+
+        class TreeCell(Agent):
+            @batch_stage
+            def grow(cls, agents):
+                ...
+
+    Calling the stage on a single agent runs it on a batch of one.
+
+    """
+    return BatchStage(func)
+
+
+def _has_instance_dict(agent_class: Type[Agent]) -> bool:
+    """Whether the instances of an agent class have a __dict__, where they
+    could override the methods of the class."""
+    return any("__dict__" in vars(base) for base in agent_class.__mro__)
+
+
 class StagedActivation(BaseScheduler):
     """A scheduler which allows agent activation to be divided into several
     stages instead of a single `step` method. All agents execute one stage
@@ -159,6 +653,14 @@ class StagedActivation(BaseScheduler):
     Agents must have all the stage methods implemented. Stage methods take a
     model object as their only argument.
 
+    Stage methods of agent classes declaring __slots__ are looked up once
+    per class and step; those of other agents on each agent, which may
+    override them. A class can declare a stage with batch_stage, to handle
+    all its agents in one call. Stages
+    where some class does so run class by class, in the order the classes
+    first appear in the activation order; the agents of classes without a
+    batch stage are then still activated one at a time.
+
     This schedule tracks steps and time separately. Time advances in fractional
     increments of 1 / (# of stages), meaning that 1 step = 1 unit of time.
 
@@ -188,18 +690,106 @@ class StagedActivation(BaseScheduler):
         self.shuffle = shuffle
         self.shuffle_between_stages = shuffle_between_stages
         self.stage_time = 1 / len(self.stage_list)
+        self._type_counts: Counter[Type[Agent]] = Counter()
+
+    def add(self, agent: Agent) -> None:
+        super().add(agent)
+        self._type_counts[type(agent)] += 1
+
+    def remove(self, agent: Agent) -> None:
+        super().remove(agent)
+        agent_class = type(agent)
+        self._type_counts[agent_class] -= 1
+        if not self._type_counts[agent_class]:
+            del self._type_counts[agent_class]
+
+    @staticmethod
+    def _stage_function(agent_class: Type[Agent], stage: str) -> Any:
+        """Return the plain function or BatchStage implementing a stage for
+        a class, or None if it must be looked up on each agent.
+
+        Plain functions are only returned for classes whose agents have no
+        __dict__, and so cannot override them.
+
+        """
+        function = inspect.getattr_static(agent_class, stage, None)
+        if isinstance(function, BatchStage):
+            return function
+        if inspect.isfunction(function) and not _has_instance_dict(agent_class):
+            return function
+        return None
+
+    def _run_stage(self, stage: str, order: Iterable[int]) -> None:
+        """Run one stage for the agents at the given positions."""
+        functions = {cls: self._stage_function(cls, stage) for cls in self._type_counts}
+        if not any(isinstance(f, BatchStage) for f in functions.values()):
+            if len(functions) == 1:
+                (function,) = functions.values()
+                if function is not None:
+                    for agent in self._agents_at(order):
+                        if agent is not None:
+                            function(agent)
+                else:
+                    for agent in self._agents_at(order):
+                        if agent is not None:
+                            getattr(agent, stage)()
+                return
+            for agent in self._agents_at(order):
+                if agent is None:
+                    continue
+                function = functions.get(type(agent))
+                if function is not None:
+                    function(agent)
+                else:
+                    getattr(agent, stage)()
+            return
+
+        def overrides(agent: Agent) -> bool:
+            return stage in getattr(agent, "__dict__", ())
+
+        groups: Dict[Type[Agent], List[Agent]] = {}
+        for agent in self._agents_at(order):
+            if agent is not None:
+                groups.setdefault(type(agent), []).append(agent)
+        agents_by_id = self._agents
+
+        def scheduled(agent: Agent) -> bool:
+            # False for agents removed by the stages run so far.
+            return agents_by_id.get(agent.unique_id) is agent
+
+        for agent_class, agents in groups.items():
+            function = functions[agent_class]
+            if isinstance(function, BatchStage):
+                # Agents overriding the batch stage run theirs afterwards.
+                batch = [a for a in agents if scheduled(a) and not overrides(a)]
+                if batch:
+                    function.func(agent_class, batch)
+                agents = [agent for agent in agents if overrides(agent)]
+            for agent in agents:
+                if not scheduled(agent):
+                    continue
+                if not inspect.isfunction(function):
+                    getattr(agent, stage)()
+                else:
+                    function(agent)
 
     def step(self) -> None:
         """Executes all the stages for all agents."""
-        agent_keys = list(self._agents.keys())
-        if self.shuffle:
-            self.model.random.shuffle(agent_keys)
-        for stage in self.stage_list:
-            for agent_key in agent_keys:
-                getattr(self._agents[agent_key], stage)()  # Run stage
-            if self.shuffle_between_stages:
-                self.model.random.shuffle(agent_keys)
-            self.time += self.stage_time
+        order = self._agent_order(self.shuffle)
+        if self.shuffle_between_stages:
+            order = list(order)
+        # All the stages use the same positions; keep the list from being
+        # compacted in between.
+        self._iterating += 1
+        try:
+            for stage in self.stage_list:
+                self._run_stage(stage, order)
+                if self.shuffle_between_stages:
+                    self.model.random.shuffle(order)
+                self.time += self.stage_time
+        finally:
+            self._iterating -= 1
+        self._compact_if_sparse()
 
         self.steps += 1
 
@@ -236,7 +826,7 @@ class RandomActivationByType(BaseScheduler):
             agent: An Agent to be added to the schedule.
         """
 
-        self._agents[agent.unique_id] = agent
+        super().add(agent)
         agent_class: Type[Agent] = type(agent)
         self.agents_by_type[agent_class][agent.unique_id] = agent
 
@@ -245,7 +835,7 @@ class RandomActivationByType(BaseScheduler):
         Remove all instances of a given agent from the schedule.
         """
 
-        del self._agents[agent.unique_id]
+        super().remove(agent)
 
         agent_class: Type[Agent] = type(agent)
         del self.agents_by_type[agent_class][agent.unique_id]
@@ -287,3 +877,221 @@ class RandomActivationByType(BaseScheduler):
         Returns the current number of agents of certain type in the queue.
         """
         return len(self.agents_by_type[type_class].values())
+
+
+class ActiveSetActivation(BaseScheduler):
+    """A scheduler which only activates the agents that are awake, in random
+    order, with the order reshuffled every step.
+
+    Agents are awake when added. sleep(agent) takes an agent out of the active
+    set until wake(agent) puts it back, so a step costs time proportional to
+    the number of awake agents rather than to the whole population. Agents
+    usually call these on themselves, e.g. self.model.schedule.sleep(self)
+    once they have nothing left to do.
+
+    An agent put to sleep during a step is skipped if its turn has not come
+    yet, even if it is woken again before then. An agent woken during a step
+    is activated from the next step on.
+
+    """
+
+    def __init__(self, model: Model, shuffle: bool = True) -> None:
+        """Create an empty ActiveSetActivation schedule.
+
+        Args:
+            model: Model object associated with the schedule.
+            shuffle: If True, shuffle the order of the awake agents each step;
+                     otherwise, activate them in the order they were woken.
+
+        """
+        super().__init__(model)
+        self.shuffle = shuffle
+        self._active: Dict[int, Agent] = {}
+        # Ids of the agents put to sleep during the current step, if any.
+        self._slept: Set[int] | None = None
+
+    def add(self, agent: Agent, active: bool = True) -> None:
+        """Add an Agent object to the schedule.
+
+        Args:
+            agent: An Agent to be added to the schedule.
+            active: If False, the agent starts asleep.
+
+        """
+        super().add(agent)
+        if active:
+            self._active[agent.unique_id] = agent
+
+    def remove(self, agent: Agent) -> None:
+        """Remove all instances of a given agent from the schedule."""
+        super().remove(agent)
+        self._active.pop(agent.unique_id, None)
+
+    def sleep(self, agent: Agent) -> None:
+        """Stop activating an agent until it is woken."""
+        self._active.pop(agent.unique_id, None)
+        if self._slept is not None:
+            self._slept.add(agent.unique_id)
+
+    def wake(self, agent: Agent) -> None:
+        """Activate an agent of the schedule again from the next step on."""
+        if agent.unique_id not in self._agents:
+            raise Exception(
+                f"Agent with unique id {repr(agent.unique_id)} is not in the scheduler"
+            )
+        self._active[agent.unique_id] = agent
+
+    def is_active(self, agent: Agent) -> bool:
+        """Returns whether an agent is awake."""
+        return agent.unique_id in self._active
+
+    def get_active_count(self) -> int:
+        """Returns the current number of awake agents."""
+        return len(self._active)
+
+    @property
+    def active_agents(self) -> List[Agent]:
+        return list(self._active.values())
+
+    def step(self) -> None:
+        """Executes the step of all awake agents, one at a time, in
+        random order.
+
+        """
+        agent_keys = list(self._active)
+        if self.shuffle:
+            self.model.random.shuffle(agent_keys)
+        active = self._active
+        slept = self._slept = set()
+        try:
+            for key in agent_keys:
+                agent = active.get(key)
+                # Agents put to sleep during the step miss their turn, even
+                # if they were woken again since.
+                if agent is not None and key not in slept:
+                    agent.step()
+        finally:
+            self._slept = None
+        self.steps += 1
+        self.time += 1
+
+
+class DiscreteEventScheduler(BaseScheduler):
+    """A scheduler which activates agents at arbitrary times, kept in a
+    priority queue.
+
+    Instead of being activated every step, each agent schedules its own next
+    activation, usually from its step method:
+
+        def step(self):
+            ...
+            self.model.schedule.schedule_in(self, 10)
+
+    Each step advances time to the next scheduled event and runs every event
+    due at that time, in the order they were scheduled. Agents without a
+    pending event cost nothing.
+
+    """
+
+    def __init__(self, model: Model) -> None:
+        """Create an empty DiscreteEventScheduler."""
+        super().__init__(model)
+        self.time: TimeT = 0
+        # Entries are (time, sequence number, agent, method, epoch).
+        self._events: List[Tuple[TimeT, int, Agent, str, int]] = []
+        self._sequence = itertools.count()
+        # Events of an agent are valid while its epoch matches theirs.
+        self._epochs: Dict[int, int] = {}
+
+    def add(self, agent: Agent, time: TimeT | None = None) -> None:
+        """Add an Agent object to the schedule.
+
+        Args:
+            agent: An Agent to be added to the schedule.
+            time: Time of the agent's first activation; defaults to the
+                  current time, i.e. the next step.
+
+        """
+        super().add(agent)
+        self._epochs[agent.unique_id] = next(self._sequence)
+        self.schedule_at(agent, self.time if time is None else time)
+
+    def remove(self, agent: Agent) -> None:
+        """Remove an agent from the schedule, cancelling its events."""
+        super().remove(agent)
+        del self._epochs[agent.unique_id]
+
+    def schedule_at(self, agent: Agent, time: TimeT, method: str = "step") -> None:
+        """Schedule an activation of an agent at a given time.
+
+        Args:
+            agent: An agent of the schedule.
+            time: When to activate it; must not be in the past.
+            method: Name of the agent's method to call.
+
+        """
+        if time < self.time:
+            raise ValueError(f"Cannot schedule an event in the past ({time}).")
+        epoch = self._epochs.get(agent.unique_id)
+        if epoch is None:
+            raise Exception(
+                f"Agent with unique id {repr(agent.unique_id)} is not in the scheduler"
+            )
+        entry = (time, next(self._sequence), agent, method, epoch)
+        heapq.heappush(self._events, entry)
+
+    def schedule_in(self, agent: Agent, delay: TimeT, method: str = "step") -> None:
+        """Schedule an activation of an agent after a delay from now."""
+        self.schedule_at(agent, self.time + delay, method)
+
+    def cancel(self, agent: Agent) -> None:
+        """Cancel all the pending events of an agent. Does nothing for
+        agents that are not in the schedule.
+
+        """
+        if self._agents.get(agent.unique_id) is not agent:
+            return
+        self._epochs[agent.unique_id] = next(self._sequence)
+
+    def _is_valid(self, entry: Tuple[TimeT, int, Agent, str, int]) -> bool:
+        return self._epochs.get(entry[2].unique_id) == entry[4]
+
+    def next_event_time(self) -> TimeT | None:
+        """Returns the time of the next pending event, or None if there is
+        none.
+
+        """
+        events = self._events
+        while events and not self._is_valid(events[0]):
+            heapq.heappop(events)
+        return events[0][0] if events else None
+
+    def step(self) -> None:
+        """Advance time to the next event and run all the events due then.
+
+        Events scheduled for the current time while the step runs are run in
+        the same step. If no event is pending, time does not change.
+
+        """
+        time = self.next_event_time()
+        if time is not None:
+            self._run_until(time)
+        self.steps += 1
+
+    def run_until(self, end_time: TimeT) -> None:
+        """Run all the events due up to end_time, then set time to end_time.
+
+        Useful to keep the scheduler in line with a model advancing in
+        regular ticks.
+
+        """
+        self._run_until(end_time)
+        self.time = max(self.time, end_time)
+
+    def _run_until(self, end_time: TimeT) -> None:
+        events = self._events
+        while events and events[0][0] <= end_time:
+            entry = heapq.heappop(events)
+            if self._is_valid(entry):
+                self.time = entry[0]
+                getattr(entry[2], entry[3])()
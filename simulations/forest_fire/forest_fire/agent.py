@@ -12,8 +12,14 @@ class TreeCell(mesa.Agent):
 
     unique_id isn't strictly necessary here, but it's good
     practice to give one to each agent anyway.
+
+    condition is tracked, so that the schedule can index trees by it and the
+    model count trees in each condition without looping over them.
     """
 
+    __slots__ = ("condition",)
+    tracked_attributes = ("condition",)
+
     def __init__(self, pos, model):
         """
         Create a new tree.
@@ -18,13 +18,16 @@ class ForestFire(mesa.Model):
         """
         # Set up model objects
         self.schedule = mesa.time.RandomActivation(self)
+        self.schedule.add_index("condition")
         self.grid = mesa.space.MultiGrid(width, height, torus=False)
 
         self.datacollector = mesa.DataCollector(
             {
-                "Fine": lambda m: self.count_type(m, "Fine"),
-                "On Fire": lambda m: self.count_type(m, "On Fire"),
-                "Burned Out": lambda m: self.count_type(m, "Burned Out"),
+                "Fine": mesa.datacollection.AttributeCount("condition", "Fine"),
+                "On Fire": mesa.datacollection.AttributeCount("condition", "On Fire"),
+                "Burned Out": mesa.datacollection.AttributeCount(
+                    "condition", "Burned Out"
+                ),
             }
         )
 
@@ -59,8 +62,4 @@ class ForestFire(mesa.Model):
         """
         Helper method to count trees in a given condition in a given model.
         """
-        count = 0
-        for tree in model.schedule.agents:
-            if tree.condition == tree_condition:
-                count += 1
-        return count
+        return model.schedule.count_by("condition", tree_condition)
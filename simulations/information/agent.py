@@ -1,5 +1,4 @@
 import mesa
-import random
 import math
 import time
 # import pdb
@@ -9,6 +8,19 @@ import time
 
 class InfoAgent(mesa.Agent):
 
+    __slots__ = (
+        "action_queue",
+        "personality_name",
+        "personality_values",
+        "condition",
+        "is_disseminative",
+        "density",
+        "amount_of_tries",
+        "wait_counter",
+        "message",
+    )
+    tracked_attributes = ("condition",)
+
     def __init__(self, pos, model, personality, density, condition="Unaware"):
         """ Create a new agent. """
 
@@ -79,7 +91,7 @@ class InfoAgent(mesa.Agent):
             # print(f"accept_chance {accept_chance} from agent {self}")
 
 
-            if random.random() < accept_chance:
+            if self.random.random() < accept_chance:
                 self.condition = "Informed"
                 self.action_queue = [self.try_disseminate]
             else:
@@ -99,7 +111,7 @@ class InfoAgent(mesa.Agent):
             # choose_dissemination = self.personality_values['extraversion']
             # decision_index = (1- self.personality_values['neuroticism'])
 
-            u = random.random()
+            u = self.random.random()
             # print(f"u {u}, extra {1-neuroticism}, Stressed {neuroticism}, agent {self.pos}")
             
             if u >= neuroticism: 
@@ -140,7 +152,7 @@ class InfoAgent(mesa.Agent):
             return None
 
         # Randomly select one of the neighbors with the highest priority index
-        target = random.choice(max_priority_neighbors)
+        target = self.random.choice(max_priority_neighbors)
         return target
 
 
@@ -1,6 +1,5 @@
 import mesa
 from agent import InfoAgent
-import random
 import pdb
 
 class InfoModel(mesa.Model):
@@ -24,6 +23,7 @@ class InfoModel(mesa.Model):
         self.all_corners = all_corners
 
         self.schedule = mesa.time.RandomActivation(self)
+        self.schedule.add_index("condition")
         
 
         # Grid Size (agents) is equal and adjusts accordingly to the number of agents 
@@ -32,11 +32,11 @@ class InfoModel(mesa.Model):
 
         self.datacollector = mesa.datacollection.DataCollector(
             {
-                "Unaware": lambda m: self.count_type(m, "Unaware"),
-                "Informed": lambda m: self.count_type(m, "Informed"),
-                "Disseminative": lambda m: self.count_type(m, "Disseminative"),
-                "Stressed": lambda m: self.count_type(m, "Stressed"),
-                "Exhausted": lambda m: self.count_type(m, "Exhausted"),
+                "Unaware": mesa.datacollection.AttributeCount("condition", "Unaware"),
+                "Informed": mesa.datacollection.AttributeCount("condition", "Informed"),
+                "Disseminative": mesa.datacollection.AttributeCount("condition", "Disseminative"),
+                "Stressed": mesa.datacollection.AttributeCount("condition", "Stressed"),
+                "Exhausted": mesa.datacollection.AttributeCount("condition", "Exhausted"),
             }
         )
 
@@ -79,7 +79,7 @@ class InfoModel(mesa.Model):
 
             # Assign each agent to a group based on the fractions
             for agent in self.sample_agents(agent_locations,  len(agent_locations)):
-                group = random.choices(groups, weights=list(fractions.values()))[0]
+                group = self.random.choices(groups, weights=list(fractions.values()))[0]
                 group_agents[group].append(agent)
 
             # Assign each agent their respective personalty
@@ -153,11 +153,7 @@ class InfoModel(mesa.Model):
         """
         Helper method to count agents in a given condition in a given model.
         """
-        count = 0
-        for agent in model.schedule.agents:
-            if agent.condition == person_condition:
-                count += 1
-        return count
+        return model.schedule.count_by("condition", person_condition)
 
     @staticmethod
     def count_all(model):
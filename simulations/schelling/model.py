@@ -6,6 +6,8 @@ class SchellingAgent(mesa.Agent):
     Schelling segregation agent
     """
 
+    __slots__ = ("type",)
+
     def __init__(self, pos, model, agent_type):
         """
         Create a new Schelling agent.
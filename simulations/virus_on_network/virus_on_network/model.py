@@ -12,7 +12,7 @@ class State(Enum):
 
 
 def number_state(model, state):
-    return sum(1 for a in model.grid.get_all_cell_contents() if a.state is state)
+    return model.schedule.count_by("state", state)
 
 
 def number_infected(model):
@@ -46,6 +46,7 @@ class VirusOnNetwork(mesa.Model):
         self.G = nx.erdos_renyi_graph(n=self.num_nodes, p=prob)
         self.grid = mesa.space.NetworkGrid(self.G)
         self.schedule = mesa.time.RandomActivation(self)
+        self.schedule.add_index("state")
         self.initial_outbreak_size = (
             initial_outbreak_size if initial_outbreak_size <= num_nodes else num_nodes
         )
@@ -56,9 +57,13 @@ class VirusOnNetwork(mesa.Model):
 
         self.datacollector = mesa.DataCollector(
             {
-                "Infected": number_infected,
-                "Susceptible": number_susceptible,
-                "Resistant": number_resistant,
+                "Infected": mesa.datacollection.AttributeCount("state", State.INFECTED),
+                "Susceptible": mesa.datacollection.AttributeCount(
+                    "state", State.SUSCEPTIBLE
+                ),
+                "Resistant": mesa.datacollection.AttributeCount(
+                    "state", State.RESISTANT
+                ),
             }
         )
 
@@ -104,6 +109,15 @@ class VirusOnNetwork(mesa.Model):
 
 
 class VirusAgent(mesa.Agent):
+    __slots__ = (
+        "state",
+        "virus_spread_chance",
+        "virus_check_frequency",
+        "recovery_chance",
+        "gain_resistance_chance",
+    )
+    tracked_attributes = ("state",)
+
     def __init__(
         self,
         unique_id,
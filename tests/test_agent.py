@@ -0,0 +1,190 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from mesa.agent import Agent, AgentAttribute
+from mesa.datacollection import DataCollector
+from mesa.model import Model
+from mesa.time import RandomActivation
+
+
+class Cell(Agent):
+    energy = AgentAttribute(dtype=np.float32, default=1.5)
+    state = AgentAttribute(categories=("S", "I", "R"))
+
+
+class InfectedCell(Cell):
+    age = AgentAttribute(dtype=np.int32)
+
+
+class SlottedAgent(Agent):
+    __slots__ = ("wealth",)
+
+    def __init__(self, unique_id, model):
+        super().__init__(unique_id, model)
+        self.wealth = unique_id
+
+    def step(self):
+        self.wealth += 1
+
+
+class BareModel(Model):
+    def __init__(self):
+        # Does not call Model.__init__, like several shipped models.
+        pass
+
+
+def test_attribute_fields():
+    assert list(Cell._attribute_fields) == ["energy", "state"]
+    assert list(InfectedCell._attribute_fields) == ["energy", "state", "age"]
+    assert Agent._attribute_fields == {}
+    assert isinstance(Cell.energy, AgentAttribute)
+
+
+def test_attribute_defaults_and_assignment():
+    model = BareModel()
+    cell = Cell(0, model)
+    assert cell.energy == 1.5
+    assert cell.state == "S"
+    cell.energy = 3
+    cell.state = "I"
+    assert cell.energy == 3.0
+    assert isinstance(cell.energy, float)
+    assert cell.state == "I"
+    with pytest.raises(ValueError):
+        cell.state = "X"
+
+
+def test_attribute_store_queries():
+    model = BareModel()
+    cells = [Cell(i, model) for i in range(40)]
+    for cell in cells[::4]:
+        cell.state = "I"
+    store = model.get_attribute_store(Cell)
+    assert len(store) == 40
+    assert store.count("state", "I") == 10
+    assert store.count("state", "S") == 30
+    np.testing.assert_array_equal(store.values("energy"), np.full(40, 1.5))
+
+    store.release(cells[0])
+    assert len(store) == 39
+    assert store.count("state", "I") == 9
+    with pytest.raises(ValueError):
+        store.release(cells[0])
+
+    # The freed slot is reused, with default values
+    new_cell = Cell(40, model)
+    assert new_cell._attribute_slot == cells[0]._attribute_slot
+    assert new_cell.state == "S"
+    assert store.count("state", "I") == 9
+    assert all(
+        cell.state == ("I" if i % 4 == 0 else "S")
+        for i, cell in enumerate(cells[1:], 1)
+    )
+
+
+def test_attribute_stores_per_class_and_model():
+    model, other = BareModel(), BareModel()
+    cell = Cell(0, model)
+    infected = InfectedCell(1, model)
+    other_cell = Cell(0, other)
+    infected.state = "I"
+    other_cell.state = "R"
+    assert model.get_attribute_store(Cell).count("state", "I") == 0
+    assert model.get_attribute_store(InfectedCell).count("state", "I") == 1
+    assert other.get_attribute_store(Cell).count("state", "R") == 1
+    assert cell.state == "S"
+
+
+def test_attribute_pickle():
+    model = BareModel()
+    cells = [Cell(i, model) for i in range(3)]
+    cells[1].state = "R"
+    restored = pickle.loads(pickle.dumps(cells))
+    assert [cell.state for cell in restored] == ["S", "R", "S"]
+    restored[0].state = "I"
+    assert cells[0].state == "S"
+    assert restored[0].model is restored[2].model
+    assert restored[0].model.get_attribute_store(Cell).count("state", "I") == 1
+
+
+def test_slotted_agent():
+    model = BareModel()
+    agent = SlottedAgent(1, model)
+    assert not hasattr(agent, "__dict__")
+    with pytest.raises(AttributeError):
+        agent.other = 1
+
+    # Subclasses without __slots__ still take arbitrary attributes
+    class PlainAgent(Agent):
+        pass
+
+    plain = PlainAgent(2, model)
+    plain.other = 1
+    assert plain.other == 1
+
+
+def test_slotted_agent_schedule_and_collect():
+    model = BareModel()
+    model.schedule = RandomActivation(model)
+    for i in range(3):
+        model.schedule.add(SlottedAgent(i, model))
+    model.schedule.step()
+    collector = DataCollector(agent_reporters={"wealth": "wealth"})
+    collector.collect(model)
+    assert sorted(collector._agent_records[1]) == [(1, 0, 1), (1, 1, 2), (1, 2, 3)]
+
+
+def test_slotted_agent_pickle():
+    model = BareModel()
+    agent = SlottedAgent(3, model)
+    agent.pos = (1, 2)
+    restored = pickle.loads(pickle.dumps(agent))
+    assert (restored.unique_id, restored.pos, restored.wealth) == (3, (1, 2), 3)
+
+
+class TrackedAgent(Agent):
+    __slots__ = ("state",)
+    tracked_attributes = ("state",)
+
+    def __init__(self, unique_id, model, state="S"):
+        super().__init__(unique_id, model)
+        self.state = state
+
+
+class PlainTrackedAgent(Agent):
+    tracked_attributes = ("state",)
+
+
+def test_tracked_attribute_listeners():
+    model = BareModel()
+    changes = []
+
+    def listener(agent, old, new):
+        changes.append((agent.unique_id, old, new))
+
+    model.add_attribute_listener("state", listener)
+    agent = TrackedAgent(0, model)
+    agent.state = "I"
+    plain = PlainTrackedAgent(1, model)
+    plain.state = "R"
+    assert plain.__dict__ == {"state": "R"}
+    cell = Cell(2, model)
+    cell.state = "I"
+    assert changes == [(0, None, "S"), (0, "S", "I"), (1, None, "R"), (2, "S", "I")]
+
+    model.remove_attribute_listener("state", listener)
+    agent.state = "R"
+    assert agent.state == "R"
+    assert len(changes) == 4
+    with pytest.raises(AttributeError):
+        PlainTrackedAgent(3, model).state
+
+
+def test_tracked_attribute_class_attribute():
+    with pytest.raises(TypeError):
+
+        class BadAgent(Agent):
+            tracked_attributes = ("state",)
+            state = 0
@@ -1,6 +1,24 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool, cpu_count
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import mesa.batchrunner
 from mesa.agent import Agent
-from mesa.batchrunner import _make_model_kwargs, batch_run
-from mesa.datacollection import DataCollector
+from mesa.batchrunner import (
+    _make_model_kwargs,
+    batch_run,
+    batch_run_iter,
+    batch_run_parquet,
+)
+from mesa.datacollection import DataCollector, DataSink
 from mesa.model import Model
 from mesa.time import BaseScheduler
 
@@ -87,10 +105,13 @@ class MockModel(Model):
 
 def test_batch_run():
     result = batch_run(MockModel, {}, number_processes=2)
+    seed = result[0]["seed"]
+    assert isinstance(seed, int)
     assert result == [
         {
             "RunId": 0,
             "iteration": 0,
+            "seed": seed,
             "Step": 1000,
             "reported_model_param": 42,
             "AgentID": 0,
@@ -100,6 +121,7 @@ def test_batch_run():
         {
             "RunId": 0,
             "iteration": 0,
+            "seed": seed,
             "Step": 1000,
             "reported_model_param": 42,
             "AgentID": 1,
@@ -109,6 +131,7 @@ def test_batch_run():
         {
             "RunId": 0,
             "iteration": 0,
+            "seed": seed,
             "Step": 1000,
             "reported_model_param": 42,
             "AgentID": 2,
@@ -136,6 +159,7 @@ def test_batch_run_no_agent_reporters():
         {
             "RunId": 0,
             "iteration": 0,
+            "seed": result[0]["seed"],
             "Step": 1000,
             "enable_agent_reporters": False,
             "reported_model_param": 42,
@@ -145,3 +169,342 @@ def test_batch_run_no_agent_reporters():
 
 def test_batch_run_single_core():
     batch_run(MockModel, {}, number_processes=1, iterations=10)
+
+
+def without_run_id(rows):
+    rows = [{k: v for k, v in row.items() if k != "RunId"} for row in rows]
+    return sorted(
+        rows,
+        key=lambda row: (row["variable_agent_param"], row["iteration"], row["AgentID"]),
+    )
+
+
+def without_seed(rows):
+    return [{k: v for k, v in row.items() if k != "seed"} for row in rows]
+
+
+def test_batch_run_pool():
+    parameters = {"variable_agent_param": [1, 2, 3]}
+    expected = batch_run(MockModel, parameters, iterations=2, max_steps=10, seed=7)
+    with Pool(2) as pool:
+        for chunksize in (None, 4):
+            result = batch_run(
+                MockModel,
+                parameters,
+                iterations=2,
+                max_steps=10,
+                chunksize=chunksize,
+                pool=pool,
+                seed=7,
+            )
+            assert without_run_id(result) == without_run_id(expected)
+            assert type(result[0]["agent_local"]) is float
+
+
+def test_batch_run_pool_chunks():
+    parameters = {"variable_agent_param": [1, 2, 3]}
+    with Pool(2) as pool, mock.patch(
+        "mesa.batchrunner._chunksize", wraps=mesa.batchrunner._chunksize
+    ) as chunksize:
+        batch_run(MockModel, parameters, max_steps=1, pool=pool, number_processes=2)
+        chunksize.assert_called_with(3, 2)
+        batch_run(MockModel, parameters, max_steps=1, pool=pool)
+        chunksize.assert_called_with(3, cpu_count())
+
+
+def test_batch_run_shared_memory():
+    parameters = {"variable_agent_param": [1, 2, 3]}
+    expected = batch_run(MockModel, parameters, iterations=2, max_steps=10, seed=7)
+    result = batch_run(
+        MockModel,
+        parameters,
+        number_processes=2,
+        iterations=2,
+        max_steps=10,
+        data_collection_period=2,
+        shared_memory=True,
+        seed=7,
+    )
+    assert without_run_id(
+        [row for row in result if row["Step"] == 10]
+    ) == without_run_id(expected)
+    assert len(result) == 6 * 6 * 3
+    assert type(result[0]["agent_local"]) is float
+    no_agents = batch_run(
+        MockModel,
+        {"enable_agent_reporters": False},
+        number_processes=2,
+        shared_memory=True,
+        max_steps=10,
+    )
+    assert no_agents == [
+        {
+            "RunId": 0,
+            "iteration": 0,
+            "seed": no_agents[0]["seed"],
+            "Step": 10,
+            "enable_agent_reporters": False,
+            "reported_model_param": 42,
+        }
+    ]
+
+
+class ListSink(DataSink):
+    """
+    Sink keeping the chunks it is given in lists.
+    """
+
+    flush_every = 10
+
+    def __init__(self):
+        self.chunks = {}
+
+    def write(self, table, df):
+        self.chunks.setdefault(table, []).append(df)
+
+    def read(self, table, columns=None):
+        return iter(self.chunks.get(table, []))
+
+
+class SinkModel(MockModel):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.datacollector.sink = ListSink()
+
+
+def test_batch_run_sink():
+    parameters = {"variable_agent_param": [1, 2]}
+    expected = batch_run(
+        MockModel, parameters, max_steps=25, data_collection_period=5, seed=3
+    )
+    result = batch_run(
+        SinkModel, parameters, max_steps=25, data_collection_period=5, seed=3
+    )
+    assert len(result) == 2 * 6 * 3
+    assert result == expected
+
+
+def shared_blocks():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="requires /dev/shm")
+def test_batch_run_shared_memory_abandoned():
+    before = shared_blocks()
+    runs = batch_run_iter(
+        MockModel,
+        {"variable_agent_param": list(range(40))},
+        number_processes=2,
+        max_steps=10,
+        chunksize=1,
+        shared_memory=True,
+    )
+    next(runs)
+    # Let the workers send back the results of the other runs.
+    time.sleep(1)
+    runs.close()
+    assert shared_blocks() <= before
+
+
+def test_batch_run_iter():
+    runs = batch_run_iter(
+        MockModel, {"variable_agent_param": [1, 2]}, iterations=2, max_steps=10, seed=3
+    )
+    first = next(runs)
+    assert len(first) == 3
+    assert {row["RunId"] for row in first} == {0}
+    rest = list(runs)
+    assert [run[0]["RunId"] for run in rest] == [1, 2, 3]
+    assert sum(rest, first) == batch_run(
+        MockModel, {"variable_agent_param": [1, 2]}, iterations=2, max_steps=10, seed=3
+    )
+
+
+def test_batch_run_parquet():
+    pytest.importorskip("pyarrow")
+    path = tempfile.mkdtemp()
+    try:
+        batch_run_parquet(
+            MockModel, {"variable_agent_param": [1, 2]}, path, max_steps=10
+        )
+        df = pd.read_parquet(path)
+        assert len(df) == 6
+        assert sorted(df["RunId"].astype(int).unique()) == [0, 1]
+        assert df["agent_local"].tolist() == [2.5] * 6
+        with pytest.raises(FileExistsError):
+            batch_run_parquet(MockModel, {}, path)
+    finally:
+        shutil.rmtree(path)
+
+
+class CountingModel(MockModel):
+    runs = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingModel.runs += 1
+        super().__init__(*args, **kwargs)
+
+
+def test_batch_run_journal():
+    path = tempfile.mkdtemp()
+    journal = os.path.join(path, "sweep.journal")
+    parameters = {"variable_agent_param": [1, 2, 3]}
+    try:
+        expected = batch_run(MockModel, parameters, iterations=2, max_steps=10)
+
+        runs = batch_run_iter(
+            CountingModel, parameters, iterations=2, max_steps=10, journal=journal
+        )
+        first = [next(runs), next(runs)]
+        runs.close()
+        # A record cut short by an interruption is dropped.
+        with open(journal, "ab") as f:
+            f.write(b"\x00" * 20)
+
+        CountingModel.runs = 0
+        result = batch_run(
+            CountingModel,
+            parameters,
+            iterations=2,
+            max_steps=10,
+            journal=journal,
+            resume=True,
+        )
+        assert CountingModel.runs == 4
+        assert without_seed(result) == without_seed(expected)
+        # The runs of the resumed sweep are seeded like the recorded ones.
+        assert result[:6] == first[0] + first[1]
+
+        CountingModel.runs = 0
+        assert (
+            batch_run(
+                CountingModel,
+                parameters,
+                iterations=2,
+                max_steps=10,
+                journal=journal,
+                resume=True,
+            )
+            == result
+        )
+        assert CountingModel.runs == 0
+
+        # Resuming with other settings would mix runs of two sweeps.
+        with pytest.raises(ValueError, match="max_steps changed"):
+            batch_run(
+                CountingModel,
+                parameters,
+                iterations=2,
+                max_steps=20,
+                journal=journal,
+                resume=True,
+            )
+        with pytest.raises(ValueError, match="iterations changed"):
+            batch_run(
+                CountingModel,
+                parameters,
+                iterations=1,
+                max_steps=10,
+                journal=journal,
+                resume=True,
+            )
+        # More iterations only run the new ones.
+        CountingModel.runs = 0
+        more = batch_run(
+            CountingModel,
+            parameters,
+            iterations=3,
+            max_steps=10,
+            journal=journal,
+            resume=True,
+        )
+        assert CountingModel.runs == 3
+        assert more[:18] == result
+        with pytest.raises(FileExistsError):
+            batch_run(MockModel, parameters, journal=journal)
+        with pytest.raises(ValueError):
+            batch_run(MockModel, parameters, resume=True)
+    finally:
+        shutil.rmtree(path)
+
+
+def test_batch_run_journal_list_parameters():
+    path = tempfile.mkdtemp()
+    journal = os.path.join(path, "sweep.journal")
+    parameters = {"variable_model_param": [[1, 2], np.array([3, 4])]}
+    try:
+        runs = batch_run_iter(CountingModel, parameters, max_steps=10, journal=journal)
+        first = next(runs)
+        runs.close()
+
+        CountingModel.runs = 0
+        result = batch_run(
+            CountingModel, parameters, max_steps=10, journal=journal, resume=True
+        )
+        assert CountingModel.runs == 1
+        assert result[:3] == first
+        assert [list(row["variable_model_param"]) for row in result] == [[1, 2]] * 3 + [
+            [3, 4]
+        ] * 3
+    finally:
+        shutil.rmtree(path)
+
+
+class RandomModel(MockModel):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.datacollector = DataCollector({"draw": "draw"})
+
+    def step(self):
+        self.draw = self.random.random()
+        super().step()
+
+
+def test_batch_run_seed():
+    parameters = {"variable_agent_param": [1, 2]}
+    result = batch_run(RandomModel, parameters, iterations=2, max_steps=0, seed=5)
+    parallel = batch_run(
+        RandomModel, parameters, iterations=2, max_steps=0, seed=5, number_processes=2
+    )
+    assert sorted(parallel, key=lambda row: row["RunId"]) == result
+    assert len({row["seed"] for row in result}) == 4
+    for row in result:
+        assert row["draw"] == random.Random(row["seed"]).random()
+
+    # A run's seed does not depend on the other runs of the sweep.
+    single = batch_run(
+        RandomModel, {"variable_agent_param": 2}, iterations=2, max_steps=0, seed=5
+    )
+    assert [row["seed"] for row in single] == [result[1]["seed"], result[3]["seed"]]
+    more = batch_run(
+        RandomModel, {"variable_agent_param": [0, 2, 1]}, max_steps=0, seed=5
+    )
+    assert [row["seed"] for row in more[1:]] == [row["seed"] for row in result[1::-1]]
+
+    (row,) = batch_run(RandomModel, {"seed": 11}, max_steps=0, seed=5)
+    assert row["seed"] == 11
+    assert row["draw"] == random.Random(11).random()
+
+
+class Opaque:
+    """Parameter value whose repr includes its address."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def test_batch_run_seed_opaque_parameters():
+    # Both sweeps are kept alive, so that their values have other addresses.
+    sweeps = [
+        batch_run(
+            RandomModel,
+            {"fixed_model_param": [Opaque(1), Opaque(2)]},
+            iterations=2,
+            max_steps=0,
+            seed=5,
+        )
+        for _ in range(2)
+    ]
+    seeds = [[row["seed"] for row in sweep] for sweep in sweeps]
+    assert seeds[0] == seeds[1]
+    assert len(set(seeds[0])) == 4
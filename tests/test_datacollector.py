@@ -1,9 +1,24 @@
 """
 Test the DataCollector
 """
+import shutil
+import tempfile
 import unittest
 
+import pandas as pd
+
 from mesa import Model, Agent
+from mesa.datacollection import (
+    ArrayReporter,
+    AttributeCount,
+    DataCollector,
+    DataSink,
+    EveryK,
+    OnChange,
+    ParquetSink,
+    Predicate,
+    Subsample,
+)
 from mesa.time import BaseScheduler
 
 
@@ -195,5 +210,258 @@ class TestDataCollectorInitialization(unittest.TestCase):
         )
 
 
+class ParityAgent(Agent):
+    """
+    Agent whose tracked parity flips every step.
+    """
+
+    tracked_attributes = ("parity",)
+
+    def __init__(self, unique_id, model):
+        super().__init__(unique_id, model)
+        self.parity = unique_id % 2
+
+    def step(self):
+        self.parity = 1 - self.parity
+        if self.unique_id == 0:
+            self.model.schedule.remove(self)
+
+
+class TestAttributeCount(unittest.TestCase):
+    def test_attribute_count(self):
+        model = Model()
+        model.schedule = BaseScheduler(model)
+        for i in range(5):
+            model.schedule.add(ParityAgent(i, model))
+        datacollector = DataCollector(
+            {"even": AttributeCount("parity", 0), "odd": AttributeCount("parity", 1)}
+        )
+        datacollector.collect(model)
+        for _ in range(2):
+            model.schedule.step()
+            datacollector.collect(model)
+        assert datacollector.model_vars == {"even": [3, 2, 2], "odd": [2, 2, 2]}
+
+
+class TestAgentColumns(unittest.TestCase):
+    def setUp(self):
+        self.model = Model()
+        self.model.schedule = BaseScheduler(self.model)
+        for i in range(3):
+            self.model.schedule.add(MockAgent(i, self.model, val=i))
+        self.datacollector = DataCollector(agent_reporters={"value": "val"})
+
+    def test_dtype_promotion(self):
+        self.datacollector.collect(self.model)
+        assert self.datacollector._agent_columns["value"].values().dtype.kind == "i"
+        self.model.schedule.steps = 1
+        for agent in self.model.schedule.agents:
+            agent.val += 0.5
+        self.datacollector.collect(self.model)
+        df = self.datacollector.get_agent_vars_dataframe()
+        assert df["value"].dtype.kind == "f"
+        assert df["value"].tolist() == [0, 1, 2, 0.5, 1.5, 2.5]
+        self.model.schedule.steps = 2
+        self.model.schedule.agents[0].val = "high"
+        self.datacollector.collect(self.model)
+        df = self.datacollector.get_agent_vars_dataframe()
+        assert df.loc[2, "value"].tolist() == ["high", 1.5, 2.5]
+        assert df.loc[0, "value"].tolist() == [0, 1, 2]
+
+    def test_recollect_step(self):
+        self.datacollector.collect(self.model)
+        self.model.schedule.steps = 1
+        self.datacollector.collect(self.model)
+        self.model.schedule.steps = 0
+        self.model.schedule.remove(self.model.schedule.agents[0])
+        self.datacollector.collect(self.model)
+        assert self.datacollector._agent_records == {
+            1: [(1, 0, 0), (1, 1, 1), (1, 2, 2)],
+            0: [(0, 1, 1), (0, 2, 2)],
+        }
+        df = self.datacollector.get_agent_vars_dataframe()
+        assert len(df) == 5
+        assert df.loc[0, "value"].tolist() == [1, 2]
+
+
+class ListSink(DataSink):
+    """
+    Sink keeping the chunks it is given in lists.
+    """
+
+    flush_every = 2
+
+    def __init__(self):
+        self.chunks = {}
+
+    def write(self, table, df):
+        self.chunks.setdefault(table, []).append(df)
+
+    def read(self, table, columns=None):
+        return iter(self.chunks.get(table, []))
+
+
+class TestDataSink(unittest.TestCase):
+    def run_model(self, sink):
+        model = MockModel()
+        model.datacollector = DataCollector(
+            {"total_agents": lambda m: m.schedule.get_agent_count()},
+            {"value": lambda a: a.val, "value2": "val2"},
+            sink=sink,
+        )
+        for i in range(5):
+            model.schedule.steps = i
+            model.datacollector.collect(model)
+            model.schedule.step()
+            if i == 2:
+                model.schedule.remove(model.schedule.agents[0])
+        return model.datacollector
+
+    def test_flush(self):
+        sink = ListSink()
+        datacollector = self.run_model(sink)
+        assert [len(df) for df in sink.chunks["model"]] == [2, 2]
+        assert [len(df) for df in sink.chunks["agent"]] == [20, 19]
+        assert datacollector.model_vars == {"total_agents": [9]}
+        assert list(datacollector._agent_records) == [4]
+
+        expected = self.run_model(None)
+        pd.testing.assert_frame_equal(
+            datacollector.get_model_vars_dataframe(),
+            expected.get_model_vars_dataframe(),
+        )
+        pd.testing.assert_frame_equal(
+            datacollector.get_agent_vars_dataframe(),
+            expected.get_agent_vars_dataframe(),
+        )
+
+        datacollector.flush()
+        assert [len(df) for df in sink.chunks["model"]] == [2, 2, 1]
+        assert datacollector.model_vars == {"total_agents": []}
+        assert len(datacollector.get_agent_vars_dataframe()) == 48
+
+
+class TestParquetSink(unittest.TestCase):
+    def setUp(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_parquet_sink(self):
+        model = MockModel()
+        sink = ParquetSink(self.path, flush_every=3)
+        model.datacollector = DataCollector(
+            {"total_agents": lambda m: m.schedule.get_agent_count()},
+            {"value": "val"},
+            sink=sink,
+        )
+        for i in range(7):
+            model.schedule.steps = i
+            model.datacollector.collect(model)
+            model.schedule.step()
+        model.datacollector.flush()
+
+        chunks = list(sink.read("agent", columns=["Step"]))
+        assert [len(chunk) for chunk in chunks] == [30, 30, 10]
+        assert list(chunks[0].columns) == ["Step"]
+        df = model.datacollector.get_agent_vars_dataframe()
+        assert df.loc[(6, 3), "value"] == 9
+        assert len(model.datacollector.get_model_vars_dataframe()) == 7
+
+        with self.assertRaises(FileExistsError):
+            ParquetSink(self.path)
+        ParquetSink(self.path, overwrite=True)
+        assert list(sink.read("agent")) == []
+
+
+class TestCollectionPolicies(unittest.TestCase):
+    def run_model(self, agent_policies, steps=6):
+        model = MockModel()
+        model.datacollector = DataCollector(
+            {"total_agents": lambda m: m.schedule.get_agent_count()},
+            {"value": "val"},
+            agent_policies=agent_policies,
+        )
+        for i in range(steps):
+            model.schedule.steps = i
+            model.datacollector.collect(model)
+            model.schedule.step()
+        return model.datacollector
+
+    def test_every_k(self):
+        datacollector = self.run_model([EveryK(2, offset=1)])
+        assert list(datacollector._agent_records) == [1, 3, 5]
+        assert datacollector.model_vars["total_agents"] == [10] * 6
+        with self.assertRaises(ValueError):
+            EveryK(0)
+
+    def test_predicate(self):
+        datacollector = self.run_model(
+            [Predicate(lambda m: m.schedule.steps > 3), EveryK(2)]
+        )
+        assert list(datacollector._agent_records) == [4]
+
+    def test_subsample(self):
+        datacollector = self.run_model([Subsample(3, seed=1)])
+        df = datacollector.get_agent_vars_dataframe()
+        assert len(df) == 18
+        assert df.groupby(level="Step").size().tolist() == [3] * 6
+        for (step, agent_id), value in df["value"].items():
+            assert value == agent_id + step
+        datacollector = self.run_model([Subsample(20)])
+        assert len(datacollector.get_agent_vars_dataframe()) == 60
+
+    def test_on_change(self):
+        model = MockModel()
+        model.datacollector = DataCollector(
+            agent_reporters={"parity": lambda a: a.val // 2},
+            agent_policies=[OnChange()],
+        )
+        for i in range(4):
+            model.schedule.steps = i
+            model.datacollector.collect(model)
+            model.schedule.step()
+        records = model.datacollector._agent_records
+        assert len(records[0]) == 10
+        assert [agent_id for _, agent_id, _ in records[1]] == [1, 3, 5, 7, 9]
+        assert [agent_id for _, agent_id, _ in records[2]] == [0, 2, 4, 6, 8]
+        assert records[3][0] == (3, 1, 2)
+
+
+class TestAgentReporters(unittest.TestCase):
+    def setUp(self):
+        self.model = MockModel()
+        self.model.schedule.agents[3].extra = "x"
+
+    def test_mixed_reporters(self):
+        datacollector = DataCollector(
+            agent_reporters={
+                "value": "val",
+                "double": lambda a: 2 * a.val,
+                "extra": "extra",
+                "total": ArrayReporter(lambda agents: [a.val + a.val2 for a in agents]),
+            }
+        )
+        datacollector.collect(self.model)
+        df = datacollector.get_agent_vars_dataframe()
+        assert df["value"].tolist() == list(range(10))
+        assert df["double"].tolist() == [2 * i for i in range(10)]
+        assert df["total"].tolist() == [2 * i for i in range(10)]
+        assert df["extra"].isna().tolist() == [True] * 3 + [False] + [True] * 6
+        assert df["extra"].iloc[3] == "x"
+
+    def test_array_reporter_length(self):
+        datacollector = DataCollector(
+            agent_reporters={"value": ArrayReporter(lambda agents: [0])}
+        )
+        with self.assertRaises(ValueError):
+            datacollector.collect(self.model)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -3,7 +3,19 @@ Test the Grid objects.
 """
 import random
 import unittest
-from mesa.space import Grid, SingleGrid, MultiGrid, HexGrid
+from unittest import mock
+
+import numpy as np
+
+from mesa.space import (
+    Grid,
+    SingleGrid,
+    MultiGrid,
+    HexGrid,
+    LRUNeighborhoodCache,
+    NeighborhoodCache,
+    NullNeighborhoodCache,
+)
 
 # Initial agent positions for testing
 #
@@ -341,6 +353,264 @@ class TestMultiGrid(unittest.TestCase):
         assert len(neighbors) == 11
 
 
+class TestOccupancy(unittest.TestCase):
+    """
+    Testing the array mirror of the cell contents.
+    """
+
+    def setUp(self):
+        self.single = SingleGrid(3, 5, torus=False, track_occupancy=True)
+        self.multi = MultiGrid(3, 5, torus=False, track_occupancy=True)
+        counter = 0
+        for x in range(3):
+            for y in range(5):
+                if TEST_GRID[x][y]:
+                    counter += 1
+                    self.single.place_agent(MockAgent(counter, None), (x, y))
+                for _ in range(TEST_MULTIGRID[x][y]):
+                    counter += 1
+                    self.multi.place_agent(MockAgent(counter, None), (x, y))
+
+    def test_occupancy_matches_cells(self):
+        """
+        Ensure the tracked array matches the array built from the cells.
+        """
+        np.testing.assert_array_equal(self.single.occupancy, TEST_GRID)
+        np.testing.assert_array_equal(self.multi.occupancy, TEST_MULTIGRID)
+        untracked = MultiGrid(3, 5, torus=False)
+        for agent in self.multi.get_cell_list_contents([(1, 2), (2, 3)]):
+            untracked.place_agent(MockAgent(agent.unique_id, None), agent.pos)
+        assert untracked.occupancy[1, 2] == 5
+        assert untracked.occupancy.sum() == 8
+        with self.assertRaises(ValueError):
+            self.single.occupancy[0, 0] = 1
+
+    def test_occupancy_follows_moves(self):
+        """
+        Ensure moving and removing agents keeps the array in sync.
+        """
+        agent = self.single[0][1]
+        self.single.move_agent(agent, (0, 0))
+        assert self.single.occupancy[0, 0] == 1
+        assert self.single.occupancy[0, 1] == 0
+        self.single.remove_agent(agent)
+        assert self.single.occupancy[0, 0] == 0
+
+        np.testing.assert_array_equal(
+            self.multi.empty_mask(), np.asarray(TEST_MULTIGRID) == 0
+        )
+        assert self.multi.density() == 5 / 15
+        agent = self.multi[1][2][0]
+        self.multi.move_agent(agent, (0, 0))
+        assert self.multi.occupancy[1, 2] == 4
+        assert self.multi.occupancy[0, 0] == 1
+        assert self.multi.density() == 6 / 15
+
+    def test_untracked_occupancy_follows_moves(self):
+        """
+        Ensure the array built from the occupied cells of a grid that does
+        not track it matches the tracked one.
+        """
+        for tracked in (self.single, self.multi):
+            untracked = type(tracked)(3, 5, torus=False)
+            twins = {}
+            for _, x, y in tracked.coord_iter():
+                for agent in tracked.get_cell_list_contents([(x, y)]):
+                    twins[agent] = MockAgent(agent.unique_id, None)
+                    untracked.place_agent(twins[agent], (x, y))
+            agents = list(twins)
+            tracked.move_agent(agents[0], (2, 4))
+            untracked.move_agent(twins[agents[0]], (2, 4))
+            tracked.remove_agent(agents[-1])
+            untracked.remove_agent(twins[agents[-1]])
+            np.testing.assert_array_equal(untracked.occupancy, tracked.occupancy)
+            for moore in (True, False):
+                np.testing.assert_array_equal(
+                    untracked.neighbor_counts(None, moore),
+                    tracked.neighbor_counts(None, moore),
+                )
+
+
+class TestNeighborCounts(unittest.TestCase):
+    """
+    Testing whole-grid neighborhood sums against get_neighbors.
+    """
+
+    def check_grid(self, grid):
+        for moore in (True, False):
+            for include_center in (True, False):
+                for radius in (1, 2, 3):
+                    counts = grid.neighbor_counts(
+                        lambda a: a.unique_id % 2 == 0, moore, include_center, radius
+                    )
+                    occupied = grid.neighbor_counts(None, moore, include_center, radius)
+                    for _, x, y in grid.coord_iter():
+                        neighbors = grid.get_neighbors(
+                            (x, y), moore, include_center, radius
+                        )
+                        assert occupied[x, y] == len(neighbors)
+                        assert counts[x, y] == len(
+                            [a for a in neighbors if a.unique_id % 2 == 0]
+                        )
+
+    def test_multigrid(self):
+        for torus in (False, True):
+            grid = MultiGrid(3, 5, torus)
+            counter = 0
+            for x in range(3):
+                for y in range(5):
+                    for _ in range(TEST_MULTIGRID[x][y]):
+                        counter += 1
+                        grid.place_agent(MockAgent(counter, None), (x, y))
+            self.check_grid(grid)
+
+    def test_hexgrid(self):
+        for torus in (False, True):
+            grid = HexGrid(3, 5, torus)
+            counter = 0
+            for x in range(3):
+                for y in range(5):
+                    for _ in range(TEST_MULTIGRID[x][y]):
+                        counter += 1
+                        grid.place_agent(MockAgent(counter, None), (x, y))
+            for include_center in (True, False):
+                for radius in (1, 2):
+                    counts = grid.neighbor_counts(None, True, include_center, radius)
+                    for _, x, y in grid.coord_iter():
+                        neighborhood = grid.get_neighborhood(
+                            (x, y), include_center, radius
+                        )
+                        assert counts[x, y] == len(
+                            [c for c in neighborhood if grid[c] is not None]
+                        )
+
+    def test_neighborhood_table(self):
+        """
+        Ensure the shared neighbor table holds sorted flat indices.
+        """
+        grid = Grid(3, 5, torus=False)
+        assert grid.get_neighborhood((0, 0), moore=True) == [(0, 1), (1, 0), (1, 1)]
+        blocks = grid._neighborhood_tables[(True, False, 1)]
+        assert list(blocks) == [0]
+        table, lengths = blocks[0]
+        assert table.shape == (15, 8)
+        assert table.dtype == np.int32
+        assert list(table[0, : lengths[0]]) == [1, 5, 6]
+        assert lengths[0] == 3
+        assert len(grid._neighborhood_tables) == 1
+
+    def test_neighborhood_table_blocks(self):
+        """
+        Ensure table rows are only built for the blocks of queried cells.
+        """
+        with mock.patch("mesa.space._TABLE_BLOCK_CELLS", 4):
+            grid = Grid(3, 5, torus=True)
+            assert grid.get_neighborhood((2, 1), moore=False) == [
+                (0, 1),
+                (1, 1),
+                (2, 0),
+                (2, 2),
+            ]
+            assert list(grid._neighborhood_tables[(False, False, 1)]) == [2]
+
+    def test_large_neighborhoods(self):
+        """
+        Ensure neighborhoods too large for a table match the table ones.
+        """
+
+        def neighborhoods(grid, include_center):
+            return [
+                (
+                    grid.get_neighborhood(
+                        (x, y), include_center=include_center, radius=2
+                    )
+                    if isinstance(grid, HexGrid)
+                    else grid.get_neighborhood((x, y), True, include_center, 2)
+                )
+                for _, x, y in grid.coord_iter()
+            ]
+
+        grids = [cls(7, 9, torus) for cls in (Grid, HexGrid) for torus in (False, True)]
+        for grid in grids:
+            for include_center in (False, True):
+                expected = neighborhoods(grid, include_center)
+                counts = grid.neighbor_counts(
+                    np.arange(63).reshape(7, 9), True, include_center, 2
+                )
+                with mock.patch("mesa.space._MAX_TABLE_BYTES", 0):
+                    fresh = type(grid)(7, 9, grid.torus, neighborhood_cache="disabled")
+                    assert neighborhoods(fresh, include_center) == expected
+                    assert np.array_equal(
+                        fresh.neighbor_counts(
+                            np.arange(63).reshape(7, 9), True, include_center, 2
+                        ),
+                        counts,
+                    )
+                    assert not fresh._neighborhood_tables
+
+    def test_hexgrid_out_of_bounds(self):
+        grid = HexGrid(3, 5, torus=False)
+        with self.assertRaises(ValueError):
+            grid.get_neighborhood((3, 0))
+
+    def test_layer(self):
+        grid = Grid(3, 5, torus=False)
+        counts = grid.neighbor_counts(np.ones((3, 5)), moore=False)
+        assert counts[1, 2] == 4
+        assert counts[0, 0] == 2
+        with self.assertRaises(ValueError):
+            grid.neighbor_counts(np.ones((5, 3)))
+
+
+class TestNeighborhoodCache(unittest.TestCase):
+    """
+    Testing the neighborhood cache policies.
+    """
+
+    def test_default_policy(self):
+        grid = Grid(3, 5, torus=False)
+        assert isinstance(grid.neighborhood_cache, LRUNeighborhoodCache)
+        first = grid.get_neighborhood((1, 1), moore=True)
+        assert grid.get_neighborhood((1, 1), moore=True) is first
+        assert grid.neighborhood_cache.hits == 1
+        assert grid.neighborhood_cache.misses == 1
+        assert grid.neighborhood_cache.size == 1
+
+    def test_lru_eviction(self):
+        grid = Grid(3, 5, torus=False, neighborhood_cache=LRUNeighborhoodCache(2))
+        grid.get_neighborhood((0, 0), moore=True)
+        grid.get_neighborhood((1, 1), moore=True)
+        grid.get_neighborhood((0, 0), moore=True)
+        grid.get_neighborhood((2, 2), moore=True)
+        cache = grid.neighborhood_cache
+        assert cache.size == 2
+        assert cache.evictions == 1
+        # (1, 1) was the least recently used entry.
+        grid.get_neighborhood((0, 0), moore=True)
+        grid.get_neighborhood((1, 1), moore=True)
+        assert (cache.hits, cache.misses) == (2, 4)
+
+    def test_policies(self):
+        grid = Grid(3, 5, torus=True, neighborhood_cache="disabled")
+        assert isinstance(grid.neighborhood_cache, NullNeighborhoodCache)
+        for _ in range(3):
+            assert len(grid.get_neighborhood((0, 0), moore=False)) == 4
+        assert grid.neighborhood_cache.misses == 3
+        assert grid.neighborhood_cache.size == 0
+
+        grid = Grid(3, 5, torus=True, neighborhood_cache="unbounded")
+        assert type(grid.neighborhood_cache) is NeighborhoodCache
+        for pos in [(x, y) for x in range(3) for y in range(5)]:
+            grid.get_neighborhood(pos, moore=True)
+        assert grid.neighborhood_cache.size == 15
+        grid.neighborhood_cache.clear()
+        assert grid.neighborhood_cache.size == 0
+        assert grid.neighborhood_cache.misses == 0
+
+        with self.assertRaises(ValueError):
+            Grid(3, 5, torus=True, neighborhood_cache="fifo")
+
+
 class TestHexGrid(unittest.TestCase):
     """
     Testing a hexagonal grid.
@@ -30,6 +30,13 @@ def test_seed(seed=23):
     assert model._seed == seed
 
 
+def test_random_per_model():
+    model, other = Model(seed=1), Model(seed=2)
+    assert model.random is not other.random
+    assert "random" not in vars(Model)
+    assert model.random.random() == Model(seed=1).random.random()
+
+
 def test_reset_randomizer(newseed=42):
     model = Model()
     oldseed = model._seed
@@ -9,7 +9,6 @@ from mesa.space import SingleGrid
 from mesa.space import NetworkGrid
 from tests.test_grid import MockAgent
 
-
 TEST_AGENTS = [(-20, -20), (-20, -20.05), (65, 18)]
 TEST_AGENTS_GRID = [(1, 1), (10, 0), (10, 10)]
 TEST_AGENTS_NETWORK_SINGLE = [0, 1, 5]
@@ -31,11 +30,15 @@ class TestSpaceToroidal(unittest.TestCase):
     Testing a toroidal continuous space.
     """
 
+    bucket_size = None
+
     def setUp(self):
         """
         Create a test space and populate with Mock Agents.
         """
-        self.space = ContinuousSpace(70, 20, True, -30, -30)
+        self.space = ContinuousSpace(
+            70, 20, True, -30, -30, bucket_size=self.bucket_size
+        )
         self.agents = []
         for i, pos in enumerate(TEST_AGENTS):
             a = MockAgent(i, None)
@@ -124,11 +127,15 @@ class TestSpaceNonToroidal(unittest.TestCase):
     Testing a toroidal continuous space.
     """
 
+    bucket_size = None
+
     def setUp(self):
         """
         Create a test space and populate with Mock Agents.
         """
-        self.space = ContinuousSpace(70, 20, False, -30, -30)
+        self.space = ContinuousSpace(
+            70, 20, False, -30, -30, bucket_size=self.bucket_size
+        )
         self.agents = []
         for i, pos in enumerate(TEST_AGENTS):
             a = MockAgent(i, None)
@@ -203,11 +210,15 @@ class TestSpaceAgentMapping(unittest.TestCase):
     Testing a continuous space for agent mapping during removal.
     """
 
+    bucket_size = None
+
     def setUp(self):
         """
         Create a test space and populate with Mock Agents.
         """
-        self.space = ContinuousSpace(70, 50, False, -30, -30)
+        self.space = ContinuousSpace(
+            70, 50, False, -30, -30, bucket_size=self.bucket_size
+        )
         self.agents = []
         for i, pos in enumerate(REMOVAL_TEST_AGENTS):
             a = MockAgent(i, None)
@@ -256,6 +267,124 @@ class TestSpaceAgentMapping(unittest.TestCase):
         with self.assertRaises(Exception):
             self.space.remove_agent(agent_to_remove)
 
+    def test_churn(self):
+        """
+        Test the mapping through growth and interleaved removals
+        """
+        rng = np.random.default_rng(0)
+        agents = list(self.agents)
+        for i in range(len(agents), 200):
+            agent = MockAgent(i, None)
+            self.space.place_agent(agent, tuple(rng.uniform((-30, -30), (70, 50))))
+            agents.append(agent)
+            if i % 3 == 0:
+                self.space.remove_agent(agents.pop(int(rng.integers(len(agents)))))
+        assert len(self.space._agent_points) == len(agents)
+        assert set(self.space._agent_to_index) == set(agents)
+        for i, agent in self.space._index_to_agent.items():
+            assert agent.pos == tuple(self.space._agent_points[i, :])
+            assert i == self.space._agent_to_index[agent]
+        for agent in agents:
+            self.space.remove_agent(agent)
+        assert len(self.space._agent_points) == 0
+        assert self.space.get_neighbors((0, 0), 100) == []
+
+
+class TestSpaceToroidalBuckets(TestSpaceToroidal):
+    """
+    Testing a toroidal continuous space with a bucket index.
+    """
+
+    bucket_size = 7
+
+
+class TestSpaceNonToroidalBuckets(TestSpaceNonToroidal):
+    """
+    Testing a non-toroidal continuous space with a bucket index.
+    """
+
+    bucket_size = 7
+
+
+class TestSpaceAgentMappingBuckets(TestSpaceAgentMapping):
+    """
+    Testing agent mapping during removal with a bucket index.
+    """
+
+    bucket_size = 7
+
+
+class TestSpaceBucketIndex(unittest.TestCase):
+    """
+    Testing that the bucket index agrees with the brute-force search.
+    """
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        for torus in (True, False):
+            brute = ContinuousSpace(70, 20, torus, -30, -30)
+            indexed = ContinuousSpace(70, 20, torus, -30, -30, bucket_size=4)
+            agents = [MockAgent(i, None) for i in range(200)]
+            for agent in agents:
+                pos = tuple(rng.uniform((-30, -30), (70, 20)))
+                brute.place_agent(agent, pos)
+                indexed.place_agent(agent, pos)
+            for agent in agents[::3]:
+                pos = tuple(rng.uniform((-30, -30), (70, 20)))
+                brute.move_agent(agent, pos)
+                indexed.move_agent(agent, pos)
+            for agent in agents[::5]:
+                brute.remove_agent(agent)
+                indexed.remove_agent(agent)
+            for _ in range(50):
+                pos = tuple(rng.uniform((-30, -30), (70, 20)))
+                radius = rng.uniform(0, 30)
+                assert brute.get_neighbors(pos, radius) == indexed.get_neighbors(
+                    pos, radius
+                )
+            agent = agents[1]
+            assert brute.get_neighbors(agent.pos, 5, False) == indexed.get_neighbors(
+                agent.pos, 5, False
+            )
+
+    def test_invalid_bucket_size(self):
+        with self.assertRaises(ValueError):
+            ContinuousSpace(70, 20, True, bucket_size=0)
+
+
+class TestSpaceNeighborsBatch(unittest.TestCase):
+    """
+    Testing that batched radius queries agree with get_neighbors.
+    """
+
+    def test_matches_get_neighbors(self):
+        rng = np.random.default_rng(0)
+        for torus in (True, False):
+            space = ContinuousSpace(70, 20, torus, -30, -30)
+            agents = [MockAgent(i, None) for i in range(200)]
+            for agent in agents:
+                space.place_agent(agent, tuple(rng.uniform((-30, -30), (70, 20))))
+            for agent in agents[::5]:
+                space.remove_agent(agent)
+            positions = [agent.pos for agent in agents[1::5]]
+            positions += [tuple(p) for p in rng.uniform((-30, -30), (70, 20), (20, 2))]
+            for radius in (0, 0.5, 4, 15, 200):
+                for include_center in (True, False):
+                    batch = space.get_neighbors_batch(
+                        np.array(positions), radius, include_center
+                    )
+                    assert len(batch) == len(positions)
+                    for pos, neighbors in zip(positions, batch):
+                        assert neighbors == space.get_neighbors(
+                            pos, radius, include_center
+                        )
+
+    def test_empty(self):
+        space = ContinuousSpace(70, 20, True, -30, -30)
+        assert space.get_neighbors_batch([(0, 0), (1, 1)], 5) == [[], []]
+        space.place_agent(MockAgent(0, None), (0, 0))
+        assert space.get_neighbors_batch([], 5) == []
+
 
 class TestSingleGrid(unittest.TestCase):
     def setUp(self):
@@ -2,7 +2,9 @@
 Test the advanced schedulers.
 """
 
+import multiprocessing
 import unittest
+import warnings
 from unittest import TestCase, mock
 from mesa import Model, Agent
 from mesa.time import (
@@ -11,6 +13,9 @@ from mesa.time import (
     RandomActivation,
     SimultaneousActivation,
     RandomActivationByType,
+    ActiveSetActivation,
+    DiscreteEventScheduler,
+    batch_stage,
 )
 
 RANDOM = "random"
@@ -132,6 +137,29 @@ class TestStagedActivation(TestCase):
         with self.assertRaises(Exception):
             model.schedule.add(agent)
 
+    def test_patched_stage_methods(self):
+        """
+        Test that stages follow methods patched on the class or set on an
+        agent after the first step.
+        """
+
+        class PatchedAgent(MockAgent):
+            pass
+
+        model = MockModel()
+        model.schedule = StagedActivation(model, ["stage_one", "stage_two"])
+        agents = [PatchedAgent(name, model) for name in "AB"]
+        for agent in agents:
+            model.schedule.add(agent)
+        model.step()
+        model.log = []
+        PatchedAgent.stage_one = lambda self: self.model.log.append(
+            self.unique_id + "_patched"
+        )
+        agents[1].stage_two = lambda: model.log.append("B_instance")
+        model.step()
+        assert model.log == ["A_patched", "B_patched", "A_2", "B_instance"]
+
 
 class TestRandomActivation(TestCase):
     """
@@ -227,5 +255,581 @@ class TestRandomActivationByType(TestCase):
         assert all(map(lambda x: x == 1, agent_steps))
 
 
+class SleepyAgent(Agent):
+    """
+    Agent that falls asleep after a number of steps, and wakes a neighbor.
+    """
+
+    def __init__(self, unique_id, model, awake_steps):
+        super().__init__(unique_id, model)
+        self.awake_steps = awake_steps
+        self.steps = 0
+        self.wakes = None
+
+    def step(self):
+        self.steps += 1
+        self.model.log.append(self.unique_id)
+        if self.steps == self.awake_steps:
+            self.model.schedule.sleep(self)
+            if self.wakes is not None:
+                self.model.schedule.wake(self.wakes)
+
+
+class TestActiveSetActivation(TestCase):
+    """
+    Test the active set activation.
+    """
+
+    def setUp(self):
+        self.model = Model()
+        self.model.log = []
+        self.model.schedule = ActiveSetActivation(self.model, shuffle=False)
+        self.agents = [SleepyAgent(i, self.model, 2) for i in range(4)]
+        for agent in self.agents[:3]:
+            self.model.schedule.add(agent)
+        self.model.schedule.add(self.agents[3], active=False)
+
+    def test_only_active_agents_step(self):
+        schedule = self.model.schedule
+        assert schedule.get_agent_count() == 4
+        assert schedule.get_active_count() == 3
+        assert not schedule.is_active(self.agents[3])
+        schedule.step()
+        schedule.step()
+        assert self.model.log == [0, 1, 2, 0, 1, 2]
+        assert schedule.get_active_count() == 0
+        schedule.step()
+        assert self.model.log == [0, 1, 2, 0, 1, 2]
+        assert (schedule.steps, schedule.time) == (3, 3)
+        assert schedule.agents == self.agents
+
+    def test_wake_during_step(self):
+        schedule = self.model.schedule
+        self.agents[0].wakes = self.agents[3]
+        schedule.step()
+        schedule.step()
+        assert self.model.log == [0, 1, 2, 0, 1, 2]
+        schedule.step()
+        assert self.model.log[6:] == [3]
+        assert schedule.active_agents == [self.agents[3]]
+
+    def test_sleep_before_turn(self):
+        schedule = self.model.schedule
+        self.agents[0].awake_steps = 1
+        self.agents[0].step = lambda: schedule.sleep(self.agents[1])
+        schedule.step()
+        assert self.model.log == [2]
+        assert schedule.active_agents == [self.agents[0], self.agents[2]]
+
+    def test_sleep_and_wake_before_turn(self):
+        schedule = self.model.schedule
+
+        def step():
+            schedule.sleep(self.agents[1])
+            schedule.wake(self.agents[1])
+            del self.agents[0].step
+
+        self.agents[0].step = step
+        schedule.step()
+        assert self.model.log == [2]
+        assert schedule.is_active(self.agents[1])
+        schedule.step()
+        assert self.model.log == [2, 0, 2, 1]
+
+    def test_remove_and_wake(self):
+        schedule = self.model.schedule
+        schedule.remove(self.agents[1])
+        assert schedule.get_active_count() == 2
+        with self.assertRaises(Exception):
+            schedule.wake(self.agents[1])
+
+    def test_step_shuffles(self):
+        schedule = ActiveSetActivation(self.model)
+        schedule.add(self.agents[0])
+        self.model.random = mock.Mock()
+        schedule.step()
+        assert self.model.random.shuffle.call_count == 1
+
+
+class TimedAgent(Agent):
+    """
+    Agent that reactivates itself after a fixed delay.
+    """
+
+    def __init__(self, unique_id, model, delay):
+        super().__init__(unique_id, model)
+        self.delay = delay
+
+    def step(self):
+        self.model.log.append((self.model.schedule.time, self.unique_id))
+        if self.delay is not None:
+            self.model.schedule.schedule_in(self, self.delay)
+
+    def alarm(self):
+        self.model.log.append((self.model.schedule.time, "alarm"))
+
+
+class TestDiscreteEventScheduler(TestCase):
+    """
+    Test the discrete event scheduler.
+    """
+
+    def setUp(self):
+        self.model = Model()
+        self.model.log = []
+        self.model.schedule = DiscreteEventScheduler(self.model)
+        self.fast = TimedAgent("fast", self.model, 2)
+        self.slow = TimedAgent("slow", self.model, 3.5)
+        self.model.schedule.add(self.fast)
+        self.model.schedule.add(self.slow, time=1)
+
+    def test_events_in_time_order(self):
+        schedule = self.model.schedule
+        for _ in range(5):
+            schedule.step()
+        assert self.model.log == [
+            (0, "fast"),
+            (1, "slow"),
+            (2, "fast"),
+            (4, "fast"),
+            (4.5, "slow"),
+        ]
+        assert schedule.steps == 5
+        assert schedule.time == 4.5
+        assert schedule.next_event_time() == 6
+
+    def test_simultaneous_events_in_scheduling_order(self):
+        schedule = self.model.schedule
+        schedule.schedule_at(self.slow, 0, "alarm")
+        schedule.step()
+        assert self.model.log == [(0, "fast"), (0, "alarm")]
+
+    def test_run_until(self):
+        schedule = self.model.schedule
+        schedule.run_until(4)
+        assert self.model.log == [(0, "fast"), (1, "slow"), (2, "fast"), (4, "fast")]
+        assert schedule.time == 4
+        schedule.run_until(4.2)
+        assert schedule.time == 4.2
+        with self.assertRaises(ValueError):
+            schedule.schedule_at(self.fast, 3)
+
+    def test_remove_and_cancel(self):
+        schedule = self.model.schedule
+        schedule.step()
+        schedule.cancel(self.fast)
+        schedule.remove(self.slow)
+        assert schedule.next_event_time() is None
+        schedule.step()
+        assert self.model.log == [(0, "fast")]
+        assert schedule.time == 0
+        with self.assertRaises(Exception):
+            schedule.schedule_in(self.slow, 1)
+        schedule.schedule_in(self.fast, 1)
+        schedule.step()
+        assert self.model.log == [(0, "fast"), (1, "fast")]
+
+    def test_cancel_unscheduled_agent(self):
+        schedule = self.model.schedule
+        schedule.remove(self.slow)
+        schedule.cancel(self.slow)
+        schedule.cancel(TimedAgent("other", self.model, 1))
+        # Same unique_id, but not the agent of the schedule
+        schedule.cancel(TimedAgent("fast", self.model, 1))
+        assert set(schedule._epochs) == {self.fast.unique_id}
+        schedule.step()
+        assert self.model.log == [(0, "fast")]
+
+    def test_readd_drops_old_events(self):
+        schedule = self.model.schedule
+        schedule.remove(self.slow)
+        schedule.add(self.slow, time=5)
+        schedule.run_until(5)
+        assert [entry for entry in self.model.log if entry[1] == "slow"] == [
+            (5, "slow")
+        ]
+
+
+class RemovingAgent(Agent):
+    """
+    Agent that removes another agent when it steps.
+    """
+
+    def __init__(self, unique_id, model, victim=None):
+        super().__init__(unique_id, model)
+        self.victim = victim
+
+    def step(self):
+        self.model.log.append(self.unique_id)
+        if self.victim is not None:
+            self.model.schedule.remove(self.victim)
+            self.victim = None
+
+
+class TestAgentView(TestCase):
+    """
+    Test the agent list of the base scheduler.
+    """
+
+    def setUp(self):
+        self.model = Model()
+        self.model.log = []
+        self.model.schedule = BaseScheduler(self.model)
+        self.agents = [RemovingAgent(i, self.model) for i in range(6)]
+        for agent in self.agents:
+            self.model.schedule.add(agent)
+
+    def test_view(self):
+        view = self.model.schedule.agents
+        assert len(view) == 6
+        assert view == self.agents
+        assert view[0] is self.agents[0]
+        assert view[-1] is self.agents[-1]
+        assert view[1:3] == self.agents[1:3]
+        assert self.agents[2] in view
+        self.model.schedule.remove(self.agents[2])
+        assert self.agents[2] not in view
+        assert len(view) == 5
+        assert list(view) == self.agents[:2] + self.agents[3:]
+        assert view[2] is self.agents[3]
+        with self.assertRaises(TypeError):
+            view[0] = self.agents[2]
+
+    def test_remove_during_step(self):
+        schedule = self.model.schedule
+        self.agents[1].victim = self.agents[4]
+        self.agents[3].victim = self.agents[0]
+        schedule.step()
+        assert self.model.log == [0, 1, 2, 3, 5]
+        assert schedule.agents == [self.agents[i] for i in (1, 2, 3, 5)]
+        schedule.step()
+        assert self.model.log[5:] == [1, 2, 3, 5]
+
+    def test_remove_while_iterating(self):
+        schedule = self.model.schedule
+        for agent in schedule.agents:
+            schedule.remove(agent)
+            schedule.add(RemovingAgent(agent.unique_id + 10, self.model))
+        assert [agent.unique_id for agent in schedule.agents] == list(range(10, 16))
+        assert schedule.get_agent_count() == 6
+
+    def test_remove_before_iterating(self):
+        schedule = self.model.schedule
+        iterator = iter(schedule.agents)
+        for agent in self.agents[1:5]:
+            schedule.remove(agent)
+        assert list(iterator) == [self.agents[0], self.agents[5]]
+        # The list is compacted once no iteration is in progress.
+        schedule.remove(self.agents[0])
+        assert schedule._agent_list == [self.agents[5]]
+
+    def test_unconsumed_iterator(self):
+        schedule = self.model.schedule
+        iterator = iter(schedule.agents)
+        del iterator
+        for agent in self.agents[:4]:
+            schedule.remove(agent)
+        assert schedule._agent_list == self.agents[4:]
+
+
+class CullingAgent(RemovingAgent):
+    """
+    Agent that removes all the other agents when it steps, and logs its
+    later passes.
+    """
+
+    def step(self):
+        super().step()
+        for agent in list(self.model.schedule.agents):
+            if agent is not self:
+                self.model.schedule.remove(agent)
+
+    def advance(self):
+        self.model.log.append(("advance", self.unique_id))
+
+    def stage_two(self):
+        self.model.log.append(("stage_two", self.unique_id))
+
+
+class TestRemoveMostDuringStep(TestCase):
+    """
+    Test removing most of the agents while a scheduler with several passes
+    steps.
+    """
+
+    def run_model(self, schedule):
+        model = schedule.model
+        model.log = []
+        model.schedule = schedule
+        agents = [RemovingAgent(i, model) for i in range(8)]
+        agents[5] = CullingAgent(5, model)
+        for agent in agents:
+            schedule.add(agent)
+        schedule.step()
+        assert schedule.agents == [agents[5]]
+        assert len(schedule._agent_list) == 1
+        schedule.step()
+        return model.log
+
+    def test_simultaneous_activation(self):
+        log = self.run_model(SimultaneousActivation(Model()))
+        assert log == [0, 1, 2, 3, 4, 5, ("advance", 5), 5, ("advance", 5)]
+
+    def test_staged_activation(self):
+        log = self.run_model(StagedActivation(Model(), ["step", "stage_two"]))
+        assert log == [0, 1, 2, 3, 4, 5, ("stage_two", 5), 5, ("stage_two", 5)]
+
+
+class LifeAgent(Agent):
+    """
+    Cell of a one-dimensional cellular automaton (rule 90).
+    """
+
+    def __init__(self, unique_id, model, alive):
+        super().__init__(unique_id, model)
+        self.alive = alive
+        self.next_alive = None
+        self.draw = None
+
+    def step(self):
+        cells = self.model.cells
+        left = cells[self.unique_id - 1].alive
+        right = cells[(self.unique_id + 1) % len(cells)].alive
+        self.next_alive = left != right
+        self.draw = self.random.random()
+
+    def advance(self):
+        self.alive = self.next_alive
+
+
+def run_life_model(**kwargs):
+    model = Model()
+    model.reset_randomizer(1)
+    model.schedule = SimultaneousActivation(model, **kwargs)
+    model.cells = [LifeAgent(i, model, i == 20) for i in range(41)]
+    for cell in model.cells:
+        model.schedule.add(cell)
+    for _ in range(10):
+        model.schedule.step()
+    return model
+
+
+def run_parallel_life_model():
+    """
+    Run the automaton in several processes, and return the final states of
+    its cells with the warnings raised.
+    """
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        model = run_life_model(processes=3, staged_attributes=["next_alive", "draw"])
+    return [c.alive for c in model.cells], [str(w.message) for w in caught]
+
+
+class TestParallelSimultaneousActivation(TestCase):
+    """
+    Test stepping simultaneous activation in several processes.
+    """
+
+    def run_model(self, **kwargs):
+        return run_life_model(**kwargs)
+
+    def test_parallel_matches_serial(self):
+        serial = self.run_model()
+        parallel = self.run_model(processes=3, staged_attributes=["next_alive", "draw"])
+        assert [c.alive for c in parallel.cells] == [c.alive for c in serial.cells]
+        assert parallel.schedule.steps == 10
+        # Partitions draw from differently seeded generators
+        draws = [c.draw for c in parallel.cells]
+        assert len(set(draws)) == len(draws)
+        again = self.run_model(processes=3, staged_attributes=["next_alive", "draw"])
+        assert [c.draw for c in again.cells] == draws
+
+    def test_workers_reused(self):
+        model = self.run_model(processes=3, staged_attributes=["next_alive", "draw"])
+        schedule = model.schedule
+        processes = [process for process, _ in schedule._workers]
+        assert len(processes) == 3
+        schedule.step()
+        assert [process for process, _ in schedule._workers] == processes
+        # Adding an agent forks new workers
+        schedule.add(LifeAgent(41, model, False))
+        schedule.step()
+        assert not any(process.is_alive() for process in processes)
+        workers = list(schedule._workers)
+        assert len(workers) == 3 and workers[0][0] not in processes
+        with schedule:
+            pass
+        assert not schedule._workers
+        assert not any(process.is_alive() for process, _ in workers)
+
+    def test_staged_attributes_required(self):
+        with self.assertRaises(ValueError):
+            SimultaneousActivation(Model(), processes=2)
+
+    def test_serial_fallback(self):
+        with mock.patch(
+            "multiprocessing.get_all_start_methods", return_value=["spawn"]
+        ):
+            with self.assertWarns(RuntimeWarning):
+                schedule = SimultaneousActivation(
+                    Model(), processes=2, staged_attributes=["next_alive"]
+                )
+        assert schedule.processes == 1
+
+    def test_daemonic_process(self):
+        serial = self.run_model()
+        with multiprocessing.get_context("fork").Pool(1) as pool:
+            alive, messages = pool.apply(run_parallel_life_model)
+        assert alive == [c.alive for c in serial.cells]
+        assert len(messages) == 1 and "steps agents serially" in messages[0]
+
+
+class BatchAgent(MockAgent):
+    """
+    Agent whose first stage is handled for all agents at once.
+    """
+
+    @batch_stage
+    def stage_one(cls, agents):
+        agents[0].model.log.append([agent.unique_id for agent in agents])
+
+
+class TestStagedActivationBatches(TestCase):
+    """
+    Test staged activation with batch stages.
+    """
+
+    def setUp(self):
+        self.model = MockModel(shuffle=False)
+        for name in ["C", "D"]:
+            self.model.schedule.add(BatchAgent(name, self.model))
+        self.model.schedule.add(MockAgent("E", self.model))
+
+    def test_batch_stage(self):
+        self.model.step()
+        assert self.model.log == [
+            "A_1",
+            "B_1",
+            "E_1",
+            ["C", "D"],
+            "A_2",
+            "B_2",
+            "C_2",
+            "D_2",
+            "E_2",
+        ]
+
+    def test_batch_stage_overridden_on_agent(self):
+        agent = self.model.schedule.agents[2]
+        agent.stage_one = lambda: self.model.log.append("C_instance")
+        self.model.step()
+        assert self.model.log[:5] == ["A_1", "B_1", "E_1", ["D"], "C_instance"]
+
+    def test_batch_stage_on_one_agent(self):
+        agent = self.model.schedule.agents[2]
+        agent.stage_one()
+        BatchAgent.stage_one([agent])
+        assert self.model.log == [["C"], ["C"]]
+
+    def test_removed_agents_are_skipped(self):
+        class RemovingBatchAgent(MockAgent):
+            @batch_stage
+            def stage_one(cls, agents):
+                model = agents[0].model
+                model.schedule.remove(model.schedule._agents["E"])
+                model.schedule.remove(model.schedule._agents["C"])
+
+        model = self.model
+        model.log = []
+        model.schedule = StagedActivation(model, ["stage_one"])
+        model.schedule.add(RemovingBatchAgent("F", model))
+        model.schedule.add(BatchAgent("C", model))
+        model.schedule.add(BatchAgent("D", model))
+        model.schedule.add(MockAgent("E", model))
+        model.schedule.add(MockAgent("A", model))
+        model.step()
+        assert model.log == [["D"], "A_1"]
+
+
+class StateAgent(Agent):
+    """
+    Agent with a tracked state.
+    """
+
+    __slots__ = ("state",)
+    tracked_attributes = ("state",)
+
+    def __init__(self, unique_id, model, state):
+        super().__init__(unique_id, model)
+        self.state = state
+
+    def step(self):
+        if self.state == "I":
+            self.state = "R"
+
+
+class TestSchedulerIndex(TestCase):
+    """
+    Test secondary attribute indexes of the schedulers.
+    """
+
+    def setUp(self):
+        self.model = Model()
+        self.model.schedule = RandomActivation(self.model)
+        self.agents = [StateAgent(i, self.model, "S") for i in range(10)]
+        for agent in self.agents[:5]:
+            self.model.schedule.add(agent)
+        self.model.schedule.add_index("state")
+        for agent in self.agents[5:]:
+            self.model.schedule.add(agent)
+
+    def test_counts(self):
+        schedule = self.model.schedule
+        assert schedule.count_by("state", "S") == 10
+        assert schedule.count_by("state", "I") == 0
+        for agent in self.agents[::3]:
+            agent.state = "I"
+        assert schedule.count_by("state", "S") == 6
+        assert sorted(a.unique_id for a in schedule.agents_by("state", "I")) == [
+            0,
+            3,
+            6,
+            9,
+        ]
+        schedule.step()
+        assert schedule.count_by("state", "I") == 0
+        assert schedule.count_by("state", "R") == 4
+
+    def test_remove(self):
+        schedule = self.model.schedule
+        schedule.remove(self.agents[0])
+        self.agents[0].state = "I"
+        assert schedule.count_by("state", "S") == 9
+        assert schedule.count_by("state", "I") == 0
+        schedule.add(self.agents[0])
+        assert schedule.count_by("state", "I") == 1
+
+    def test_untracked_attribute(self):
+        with self.assertRaises(ValueError):
+            self.model.schedule.add_index("unique_id")
+
+    def test_mixed_agent_classes(self):
+        schedule = self.model.schedule
+        plain = Agent(10, self.model)
+        schedule.add(plain)
+        assert schedule.get_agent_count() == 11
+        assert schedule.count_by("state", "S") == 10
+        assert schedule.count_by("state", None) == 0
+        schedule.remove(plain)
+        assert schedule.count_by("state", "S") == 10
+
+        # Only agents of classes tracking the attribute are indexed
+        schedule = BaseScheduler(self.model)
+        schedule.add(Agent(0, self.model))
+        schedule.add(StateAgent(1, self.model, "I"))
+        schedule.add_index("state")
+        assert [a.unique_id for a in schedule.agents_by("state", "I")] == [1]
+
+
 if __name__ == "__main__":
     unittest.main()